@@ -0,0 +1,310 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# batch functions working on whole coordinate arrays at once, instead of one Point2D object per call.
+# numpy is used when it is installed, otherwise the same results are computed with plain python loops.
+
+import math
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+from Geo2DKernels import edgeColumns,pointInPolygon,pointDistance,pointLineDistance,pointSegmentDistance
+from Geo2DPredicates import isExactMode
+
+try:
+    import numpy
+except ImportError:    # numpy is optional
+    numpy = None
+
+
+pointChunkElements = 1<<20    # at most this many (point, edge) pairs are held in memory at the same time
+
+
+def _splitCoordinates(xs,ys):
+    '''Receive two coordinate sequences, or one flat sequence <x0, y0, x1, y1, ...> or a point array with ys as None.'''
+    if ys is None:
+        if isinstance(xs,PointArray):
+            return xs.xs,xs.ys
+        if len(xs)&1:
+            raise GeometryTypeError("A flat coordinate buffer must hold an even count of floats.")
+        return xs[0::2],xs[1::2]
+
+    if len(xs)!=len(ys):
+        raise GeometryTypeError("The x-coordinates and the y-coordinates are not of the same length.")
+    return xs,ys
+
+
+def _isInPolygonChunk(px,py,edges):
+    '''numpy version of 'pointInPolygon()', for a chunk of points against all edges at once.'''
+    sx,sy,ex,ey = edges
+    px = px[:,None]    # points along the rows, edges along the columns
+    py = py[:,None]
+
+    crossed = (sy>py)!=(ey>py)    # the edge crosses the horizontal line through the point
+    side = (ex-sx)*(py-sy)-(ey-sy)*(px-sx)    # positive if the point is on the left of the edge, as in 'pointInSegment()'
+
+    # the same test as 'pointInSegment()', on every edge
+    onEdge = side==0
+    onEdge &= (numpy.minimum(sx,ex)<=px)&(px<=numpy.maximum(sx,ex))
+    onEdge &= (numpy.minimum(sy,ey)<=py)&(py<=numpy.maximum(sy,ey))
+    right = crossed&((side>0)==(ey>sy))
+    return onEdge.any(axis=1)|(right.sum(axis=1)&1).astype(bool)
+
+
+def isInPolygonBatch(xs,ys,polygon):
+    '''To determine whether each of many points is in a polygon, including its edge.
+    Receive the x-coordinates and the y-coordinates as two sequences (numpy arrays, arrays or lists),
+    or one flat sequence <x0, y0, x1, y1, ...> or a point array with ys as None. Return a boolean mask in the same order,
+    a numpy array if numpy is installed or else a list.'''
+
+    if not isinstance(polygon,Polygon2D):
+        raise GeometryTypeError("A non-polygon object encountered in function 'isInPolygonBatch()'.")
+    xs,ys = _splitCoordinates(xs,ys)
+    edges = edgeColumns(polygon)
+    if numpy is not None:
+        xs = numpy.asarray(xs,dtype=numpy.float64)
+        ys = numpy.asarray(ys,dtype=numpy.float64)
+        edges = tuple(numpy.array(eachColumn) for eachColumn in edges)
+
+    return _isInPolygonColumns(xs,ys,edges,polygon.getBoundingBox())
+
+
+def _isInPolygonColumns(xs,ys,edges,box):
+    '''The work of 'isInPolygonBatch()' on prepared columns: the coordinates and the columns of 'edgeColumns()' as numpy
+    arrays if numpy is installed, or else as any sequences, and the bounding box of the polygon.
+    In exact mode the points are tested one by one, as numpy has no exact signs.'''
+    minX,minY,maxX,maxY = box
+
+    if numpy is None or isExactMode():
+        if numpy is not None:
+            edges = [numpy.asarray(eachColumn).tolist() for eachColumn in edges]    # plain floats for exact signs
+        edges = zip(*edges)    # as tuples (x1, y1, x2, y2)
+        mask = []
+        for i in xrange(len(xs)):
+            x = float(xs[i])
+            y = float(ys[i])
+            mask.append(minX<=x<=maxX and minY<=y<=maxY and pointInPolygon(x,y,edges))
+        return mask if numpy is None else numpy.array(mask,dtype=bool)
+
+    mask = numpy.zeros(len(xs),dtype=bool)
+    inBox = numpy.flatnonzero((minX<=xs)&(xs<=maxX)&(minY<=ys)&(ys<=maxY))    # only these points need the edges
+    chunk = max(1,pointChunkElements//max(1,len(edges[0])))
+    for start in xrange(0,len(inBox),chunk):
+        selected = inBox[start:start+chunk]
+        mask[selected] = _isInPolygonChunk(xs[selected],ys[selected],edges)
+    return mask
+
+
+def _distanceTarget(target):
+    '''Get the coordinates of a point or a segment, as a tuple of its kind and its coordinates.'''
+    if isinstance(target,Point2D):
+        return ('point',target.x,target.y)
+    elif isinstance(target,Segment2D):
+        return ('line',target.startPoint.x,target.startPoint.y,target.endPoint.x,target.endPoint.y)
+    raise GeometryTypeError("Could not generate distance with given parameters (second one).")
+
+
+def _distanceColumns(xs,ys,target):
+    '''The work of 'getDistanceBatch()' on prepared columns, numpy arrays if numpy is installed, and a target
+    from '_distanceTarget()'.'''
+    kind = target[0]
+
+    if numpy is None:
+        if kind=='point':
+            x2,y2 = target[1:]
+            return [pointDistance(float(xs[i]),float(ys[i]),x2,y2) for i in xrange(len(xs))]
+        x1,y1,x2,y2 = target[1:]
+        return [pointLineDistance(float(xs[i]),float(ys[i]),x1,y1,x2,y2) for i in xrange(len(xs))]
+
+    if kind=='point':
+        x2,y2 = target[1:]
+        return numpy.sqrt((xs-x2)**2+(ys-y2)**2)
+    # the same steps as 'pointLineDistance()'
+    x1,y1,x2,y2 = target[1:]
+    if y1==y2:
+        return numpy.abs(ys-y1)
+    elif x1==x2:
+        return numpy.abs(xs-x1)
+    dx = x2-x1
+    dy = y2-y1
+    return numpy.abs(dx*(ys-y1)-dy*(xs-x1))/math.hypot(dx,dy)
+
+
+def getDistanceBatch(xs,ys,target):
+    '''Get the distance from each of many points to a point, or to the line in which a segment exists, the same as
+    'getDistance()'. Receive the coordinates as 'isInPolygonBatch()' does. Return the distances in the same order,
+    a numpy array if numpy is installed or else a list.'''
+    target = _distanceTarget(target)
+    xs,ys = _splitCoordinates(xs,ys)
+    if numpy is not None:
+        xs = numpy.asarray(xs,dtype=numpy.float64)
+        ys = numpy.asarray(ys,dtype=numpy.float64)
+    return _distanceColumns(xs,ys,target)
+
+
+def _pointColumns(points):
+    '''Get the coordinates of a point array, or of a sequence of points or of tuples (x, y), as two columns.'''
+    if not isinstance(points,PointArray):
+        try:
+            points = PointArray.fromPoints(points)
+        except TypeError:
+            raise GeometryTypeError("Could not get the coordinates of the given points.")
+    return points.xs,points.ys
+
+
+def _segmentColumns(segments):
+    '''Get the coordinates of a segment array, or of a sequence of segments, as four columns x1, y1, x2, y2.'''
+    if isinstance(segments,SegmentArray):
+        starts = segments.startPoints
+        if not segments.closed:
+            return starts.xs,starts.ys,segments.endPoints.xs,segments.endPoints.ys
+        xs = list(starts.xs)
+        ys = list(starts.ys)
+        return xs,ys,xs[1:]+xs[:1],ys[1:]+ys[:1]    # the last segment goes back to the first point
+
+    columns = ([],[],[],[])
+    for eachSegment in segments:
+        if not isinstance(eachSegment,Segment2D):
+            raise GeometryTypeError("A non-segment object encountered when trying to get the distances to segments.")
+        columns[0].append(eachSegment.startPoint.x)
+        columns[1].append(eachSegment.startPoint.y)
+        columns[2].append(eachSegment.endPoint.x)
+        columns[3].append(eachSegment.endPoint.y)
+    return columns
+
+
+def _pointDistanceChunk(px,py,targets):
+    '''numpy version of 'pointDistance()', for a chunk of points against all target points at once.'''
+    qx,qy = targets
+    return numpy.sqrt((px[:,None]-qx)**2+(py[:,None]-qy)**2)
+
+
+def _lineDistanceChunk(px,py,targets):
+    '''numpy version of 'pointLineDistance()', for a chunk of points against all segments at once.'''
+    x1,y1,x2,y2 = targets
+    px = px[:,None]    # points along the rows, segments along the columns
+    py = py[:,None]
+    dx = x2-x1
+    dy = y2-y1
+    length = numpy.hypot(dx,dy)
+    length[length==0] = 1.0    # for segments of no length, which are horizontal anyway
+    distances = numpy.abs(dx*(py-y1)-dy*(px-x1))/length
+    distances = numpy.where(x1==x2,numpy.abs(px-x1),distances)
+    return numpy.where(y1==y2,numpy.abs(py-y1),distances)
+
+
+def _segmentDistanceChunk(px,py,targets):
+    '''numpy version of 'pointSegmentDistance()', for a chunk of points against all segments at once.'''
+    x1,y1,x2,y2 = targets
+    px = px[:,None]
+    py = py[:,None]
+    dx = x2-x1
+    dy = y2-y1
+    length2 = dx*dx+dy*dy
+    t = ((px-x1)*dx+(py-y1)*dy)/numpy.where(length2==0,1.0,length2)
+    t = numpy.clip(t,0.0,1.0)
+    footX = numpy.where(t==1.0,x2,x1+t*dx)    # end points as they are, the same as 'pointSegmentDistance()'
+    footY = numpy.where(t==1.0,y2,y1+t*dy)
+    return numpy.sqrt((px-footX)**2+(py-footY)**2)
+
+
+def _chunkedDistances(xs,ys,targets,chunkFunction,kernel,nearest):
+    '''Get the distances from the points to the targets, given as columns, a row for each point. If nearest is true
+    only the index of the nearest target to each point and the distance to it are kept, as two columns, and no
+    more than 'pointChunkElements' distances are held at the same time.'''
+    count = len(xs)
+    targetCount = len(targets[0])
+    if nearest and not targetCount:
+        raise GeometryTypeError("There is nothing to find the nearest one of.")
+
+    if numpy is None:
+        targets = zip(*targets)
+        if not nearest:
+            return [[kernel(float(xs[i]),float(ys[i]),*eachTarget) for eachTarget in targets] for i in xrange(count)]
+        indexes = []
+        distances = []
+        for i in xrange(count):
+            x = float(xs[i])
+            y = float(ys[i])
+            best = 0
+            bestDistance = kernel(x,y,*targets[0])
+            for j in xrange(1,targetCount):
+                distance = kernel(x,y,*targets[j])
+                if distance<bestDistance:
+                    best = j
+                    bestDistance = distance
+            indexes.append(best)
+            distances.append(bestDistance)
+        return indexes,distances
+
+    xs = numpy.asarray(xs,dtype=numpy.float64)
+    ys = numpy.asarray(ys,dtype=numpy.float64)
+    targets = tuple(numpy.asarray(eachColumn,dtype=numpy.float64) for eachColumn in targets)
+    chunk = max(1,pointChunkElements//max(1,targetCount))
+    if nearest:
+        indexes = numpy.empty(count,dtype=numpy.intp)
+        distances = numpy.empty(count)
+    else:
+        matrix = numpy.empty((count,targetCount))
+    for start in xrange(0,count,chunk):
+        block = chunkFunction(xs[start:start+chunk],ys[start:start+chunk],targets)
+        if nearest:
+            best = block.argmin(axis=1)
+            indexes[start:start+chunk] = best
+            distances[start:start+chunk] = block[numpy.arange(len(best)),best]
+        else:
+            matrix[start:start+chunk] = block
+    return (indexes,distances) if nearest else matrix
+
+
+def distanceMatrix(points,others,nearest=False):
+    '''Get the distance between each of the points and each of the others, both given as point arrays or sequences
+    of points or of tuples (x, y). Return a matrix with a row for each point, a numpy array if numpy is installed or
+    else a list of lists.
+    If nearest is true return instead a tuple (indexes, distances) of the index of the nearest of the others to
+    each point and the distance to it, computed in chunks without holding the whole matrix.'''
+    xs,ys = _pointColumns(points)
+    return _chunkedDistances(xs,ys,_pointColumns(others),_pointDistanceChunk,pointDistance,nearest)
+
+
+def pointSegmentDistances(points,segments,mode='segment',nearest=False):
+    '''Get the distance between each of the points and each of the segments, given as a segment array or a sequence
+    of segments. The distance is to the segment itself with mode 'segment', or to the line in which it exists with
+    mode 'line', the same as 'getDistance()'. Return a matrix, or the nearest segments, as 'distanceMatrix()' does.'''
+    if mode=='segment':
+        chunkFunction,kernel = _segmentDistanceChunk,pointSegmentDistance
+    elif mode=='line':
+        chunkFunction,kernel = _lineDistanceChunk,pointLineDistance
+    else:
+        raise GeometryTypeError("Unknown distance mode '%s', either 'segment' or 'line'." %mode)
+    xs,ys = _pointColumns(points)
+    return _chunkedDistances(xs,ys,_segmentColumns(segments),chunkFunction,kernel,nearest)
+
+
+
+
+if __name__=='__main__':
+    polygon = Polygon2D((0,0),(0,1),(-1,1),(-1,-1),(3,-1),(3,0),(2,0),(2,1),(1,1),(1,0))
+    xs = [-1.5,-0.5,0.5,1.5,2.5,0.0]
+    ys = [0.0,0.0,0.5,-0.5,0.5,1.0]
+    print isInPolygonBatch(xs,ys,polygon)
+    print isInPolygonBatch([0.5,0.5,1.5,-0.5],None,polygon)
+    print getDistanceBatch(xs,ys,Segment2D((0,1),(2,3)))
+    print pointSegmentDistances(zip(xs,ys),polygon.edgeList,nearest=True)
+    print distanceMatrix([(0,0),(3,4)],[(0,0),(1,1),(6,8)])
+
+    # a point 'isInSegment()' finds on an edge is in the polygon, however the products round
+    from Geo2DFunctions import isInSegment,isInPolygon
+    import random
+    random.seed(1)
+    polygon = Polygon2D((0,0),(5.453565066719325,-0.4528848651449162),(9.134260623360191,6.495207844598582),(3,3),
+                        (-2.3302831061789564,7.509732889622358))
+    onEdge = []
+    for eachEdge in polygon.edgeList:
+        for i in xrange(200):
+            t = random.random()
+            p = Point2D(eachEdge.startPoint.x+t*(eachEdge.endPoint.x-eachEdge.startPoint.x),
+                        eachEdge.startPoint.y+t*(eachEdge.endPoint.y-eachEdge.startPoint.y))
+            if isInSegment(p,eachEdge):
+                onEdge.append(p)
+    print len(onEdge),all(isInPolygon(p,polygon) for p in onEdge),all(isInPolygonBatch([p.x for p in onEdge],[p.y for p in onEdge],polygon))
@@ -0,0 +1,192 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# benchmarks of the construction of geometry objects and of the public functions, at scaling input sizes.
+# run it as a script, results are written as JSON. e.g.
+#     python Geo2DBenchmark.py --sizes 10,100,1000 --output bench.json
+
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+from Geo2DFunctions import *
+from Geo2DVector import *
+
+
+defaultSizes = (10,100,1000,10000,100000)
+queryCount = 1000    # count of queries against a polygon of each size
+
+
+def _starCoordinates(count,seed):
+    '''Get the vertexes of a star-shaped (non-convex) polygon as a list of tuples, each at a random radius.'''
+    rand = random.Random(seed)
+    return [(math.cos(2*math.pi*i/count)*rand.uniform(0.9,1.0),math.sin(2*math.pi*i/count)*rand.uniform(0.9,1.0))
+            for i in xrange(count)]
+
+
+def _circleCoordinates(count):
+    '''Get the vertexes of a regular (convex) polygon as a list of tuples.'''
+    return [(math.cos(2*math.pi*i/count),math.sin(2*math.pi*i/count)) for i in xrange(count)]
+
+
+def _randomPoints(count,seed,low=-1.0,high=1.0):
+    rand = random.Random(seed)
+    return [Point2D(rand.uniform(low,high),rand.uniform(low,high)) for i in xrange(count)]
+
+
+def _randomSegments(count,seed):
+    rand = random.Random(seed)
+    segments = []
+    while len(segments)<count:
+        try:
+            segments.append(Segment2D((rand.uniform(-1,1),rand.uniform(-1,1)),(rand.uniform(-1,1),rand.uniform(-1,1))))
+        except CoincidedPointsException:
+            pass
+    return segments
+
+
+def _timeIt(run,repeat):
+    '''Get the best time in seconds of calling run() the given count of times.'''
+    best = None
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in xrange(repeat):
+            start = time.time()
+            run()
+            elapsed = time.time()-start
+            if best is None or elapsed<best:
+                best = elapsed
+    finally:
+        if gcEnabled:
+            gc.enable()
+    return best
+
+
+def _benchmarks(size):
+    '''Get the benchmarks at one size as a list of tuples (name, count of operations, function to time).
+    Inputs are built here, out of the timing.'''
+    starCoordinates = _starCoordinates(size,size)
+    starPolygon = Polygon2D(*starCoordinates)
+    convexPolygon = Polygon2D(*_circleCoordinates(max(size,3)))
+    starPolygon.isConvex()    # cache what a polygon derives once, so that the queries are timed alone
+    convexPolygon.isConvex()
+
+    points = _randomPoints(size,size+1)
+    segments = _randomSegments(size,size+2)
+    otherSegments = _randomSegments(size,size+3)
+    queries = _randomPoints(queryCount,size+4)
+    vectors = [Vector2D(eachPoint.x,eachPoint.y) for eachPoint in points]
+    coordinates = [(eachPoint.x,eachPoint.y) for eachPoint in points]
+    pairs = zip(points,points[1:]+points[:1])
+    segmentPairs = zip(segments,otherSegments)
+
+    def constructPoints():
+        for x,y in coordinates:
+            Point2D(x,y)
+
+    def constructSegments():
+        for p1,p2 in pairs:
+            Segment2D(p1,p2)
+
+    def constructPolygon():
+        Polygon2D(*starCoordinates)
+
+    def runIsInSegment():
+        for eachPoint,eachSegment in zip(points,segments):
+            isInSegment(eachPoint,eachSegment)
+
+    def runIsInPolygon(polygon):
+        def run():
+            for eachPoint in queries:
+                isInPolygon(eachPoint,polygon)
+        return run
+
+    def runGetIntersect():
+        for s1,s2 in segmentPairs:
+            try:
+                getIntersect(s1,s2)
+            except (ParallelLineException,CoincidedLinesException,NoIntersectError):
+                pass
+
+    def runPointDistance():
+        for p1,p2 in pairs:
+            getDistance(p1,p2)
+
+    def runSegmentDistance():
+        for eachPoint,eachSegment in zip(points,segments):
+            getDistance(eachPoint,eachSegment)
+
+    def runVectorAdd():
+        for v1,v2 in zip(vectors,vectors[1:]):
+            v1+v2
+
+    def runVectorDerived():
+        for eachVector in vectors:
+            Vector2D(eachVector.x,eachVector.y).norm
+
+    def runInnerProduct():
+        for v1,v2 in zip(vectors,vectors[1:]):
+            getInnerProduct(v1,v2)
+
+    return [('Point2D',size,constructPoints),
+            ('Segment2D',size,constructSegments),
+            ('Polygon2D',size,constructPolygon),
+            ('isInSegment',size,runIsInSegment),
+            ('isInPolygon',queryCount,runIsInPolygon(starPolygon)),
+            ('isInPolygon_convex',queryCount,runIsInPolygon(convexPolygon)),
+            ('getIntersect',size,runGetIntersect),
+            ('getDistance_points',size,runPointDistance),
+            ('getDistance_pointSegment',size,runSegmentDistance),
+            ('Vector2D_add',max(size-1,0),runVectorAdd),
+            ('Vector2D_norm',size,runVectorDerived),
+            ('getInnerProduct',max(size-1,0),runInnerProduct)]
+
+
+def runBenchmarks(sizes=defaultSizes,repeat=3,names=None,log=None):
+    '''Run the benchmarks at each size, best of repeat runs. Return a list of dicts, one for each benchmark and size.'''
+    results = []
+    for size in sizes:
+        for name,operations,run in _benchmarks(size):
+            if names and name not in names:
+                continue
+            seconds = _timeIt(run,repeat)
+            result = {'benchmark':name,'size':size,'operations':operations,'seconds':seconds,
+                      'secondsPerOperation':seconds/operations if operations else None}
+            results.append(result)
+            if log:
+                log.write("%-26s size %-8d %12.6f s\n" %(name,size,seconds))
+    return results
+
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the construction of geometry objects and the public functions.")
+    parser.add_argument('--sizes',default=','.join([str(size) for size in defaultSizes]),
+                        help="comma-separated input sizes, count of vertexes or of elements (default %(default)s)")
+    parser.add_argument('--repeat',type=int,default=3,help="runs of each benchmark, the best one is kept (default %(default)s)")
+    parser.add_argument('--only',default='',help="comma-separated names of the benchmarks to run (default all)")
+    parser.add_argument('--output',default='',help="file to write the JSON results to (default standard output)")
+    arguments = parser.parse_args()
+
+    sizes = [int(size) for size in arguments.sizes.split(',') if size]
+    names = [name for name in arguments.only.split(',') if name]
+    results = runBenchmarks(sizes,arguments.repeat,names,sys.stderr)
+    report = {'python':platform.python_version(),'platform':platform.platform(),'time':time.time(),
+              'repeat':arguments.repeat,'results':results}
+
+    if arguments.output:
+        output = open(arguments.output,'w')
+        json.dump(report,output,indent=1,sort_keys=True)
+        output.close()
+    else:
+        json.dump(report,sys.stdout,indent=1,sort_keys=True)
+        sys.stdout.write('\n')
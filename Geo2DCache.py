@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# an opt-in, size-bounded LRU cache for the results of repeated geometry function calls
+
+import functools
+from collections import OrderedDict
+
+from Geo2DExceptions import *
+
+
+# exceptions that are part of a function's answer for given coordinates, such as no intersect.
+# they are cached as their type and arguments, and raised again as a new exception of the same type
+cachedExceptions = (ParallelLineException,CoincidedLinesException,NoIntersectError,CrossingLinesNoDistanceError)
+
+
+class LRUCache(object):
+    '''A mapping of at most maxSize entries that drops the least recently used one when full, and counts its hits
+    and misses.'''
+
+    def __init__(self,maxSize=4096):
+        self.maxSize = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = OrderedDict()    # from the least recently used to the most recently used
+
+        if (not isinstance(maxSize,int)) or maxSize<1:
+            raise GeometryTypeError("The size of a cache must be a positive integer.")
+        self.maxSize = maxSize
+
+
+    def get(self,key):
+        '''Get a tuple (found, value), and mark the entry as the most recently used.'''
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return False,None
+        self.entries[key] = value
+        self.hits += 1
+        return True,value
+
+
+    def put(self,key,value):
+        self.entries.pop(key,None)
+        self.entries[key] = value
+        if len(self.entries)>self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def getStats(self):
+        '''Get the hits, misses, evictions, current size and maximal size as a dict.'''
+        return {'hits':self.hits,'misses':self.misses,'evictions':self.evictions,
+                'size':len(self.entries),'maxSize':self.maxSize}
+
+
+_cache = None    # the shared cache, None while caching is disabled
+
+
+def enableCache(maxSize=4096):
+    '''Start caching the results of the memoized functions, in a new cache of at most maxSize entries.'''
+    global _cache
+    _cache = LRUCache(maxSize)
+
+
+def disableCache():
+    '''Stop caching and drop every cached result.'''
+    global _cache
+    _cache = None
+
+
+def isCacheEnabled():
+    return _cache is not None
+
+
+def clearCache():
+    '''Drop every cached result and reset the counts, keeping the cache enabled.'''
+    if _cache is not None:
+        _cache.clear()
+
+
+def getCacheStats():
+    '''Get the statistics of the cache as a dict, or None if caching is disabled.'''
+    if _cache is None:
+        return None
+    return _cache.getStats()
+
+
+def memoize(keyOf,store=None,restore=None):
+    '''Decorate a function so that its results are looked up in the shared cache while caching is enabled.
+    keyOf receives the same arguments and gives a hashable key, or None if the call should not be cached.
+    store and restore convert a result to and from what is kept, for results that should not be shared.'''
+
+    def decorate(function):
+        @functools.wraps(function)
+        def memoized(*args,**kwargs):
+            cache = _cache
+            if cache is None:
+                return function(*args,**kwargs)
+            key = keyOf(*args,**kwargs)
+            if key is None:
+                return function(*args,**kwargs)
+
+            found,entry = cache.get(key)
+            if not found:
+                try:
+                    result = function(*args,**kwargs)
+                except cachedExceptions as e:
+                    entry = (False,type(e),e.args)
+                else:
+                    entry = (True,store(result) if store else result,None)
+                cache.put(key,entry)
+
+            isResult,value,exceptionArgs = entry
+            if not isResult:
+                raise value(*exceptionArgs)
+            return restore(value) if restore else value
+
+        return memoized
+    return decorate
+
+
+
+
+if __name__=='__main__':
+    cache = LRUCache(2)
+    cache.put('a',1)
+    cache.put('b',2)
+    print cache.get('a')
+    cache.put('c',3)
+    print cache.get('b')
+    print cache.getStats()
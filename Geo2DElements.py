@@ -3,24 +3,38 @@
 
 # define classes (points, lines, segments, polygons, etc) of 2D geometry
 
+import itertools
+import math
+from array import array
+
 from Geo2DExceptions import *
 
 
 infinity = "infinity"
 
+_polygonSerials = itertools.count()    # gives each polygon a unique serial number
+
 
 class PlaneGeometryComponent(object):    # a visual class for geometry objects
-    pass
+    __slots__ = ()    # so that subclasses declaring __slots__ have no __dict__
+
+
+def _getSlotsState(obj):    # objects with __slots__ but without __dict__ need these two to be pickled
+    return dict((name,getattr(obj,name)) for name in obj.__slots__ if hasattr(obj,name))
+
+
+def _setSlotsState(obj,state):
+    for name,value in state.items():
+        setattr(obj,name,value)
 
 
 class Point2D(PlaneGeometryComponent):
+    __slots__ = ('x','y')    # no __dict__ for each of the many points, attributes are declared here
+    
     def __init__(self,x,y):    # receive two floats
-        self.x = 0.0
-        self.y = 0.0
-        
-        if (type(x)!=type(0)) and (type(x)!=type(0.0)):
+        if type(x) is not float and type(x) is not int:
             raise CoordinateNotDigitException("Invalid parameter type for the x-coordinate to construct a point.")
-        if (type(y)!=type(0)) and (type(y)!=type(0.0)):
+        if type(y) is not float and type(y) is not int:
             raise CoordinateNotDigitException("Invalid parameter type for the y-coordinate to construct a point.")
         self.x = float(x)
         self.y = float(y)
@@ -32,18 +46,22 @@ class Point2D(PlaneGeometryComponent):
         return (other.x==self.x) and (other.y==self.y)
     
     
+    def __hash__(self):    # equal points have equal hashes
+        return hash((self.x,self.y))
+    
+    
+    __getstate__ = _getSlotsState
+    __setstate__ = _setSlotsState
+    
+    
     def __str__(self):
         return "Point2D <%.2f, %.2f>" %(self.x,self.y)
         
         
 class Segment2D(PlaneGeometryComponent):
+    __slots__ = ('startPoint','endPoint','_slope','_xIntercept','_yIntercept')    # slope and intercepts are derived on first access
+    
     def __init__(self,p1,p2):    # receive two point2d objects
-        self.startPoint = Point2D(0,0)
-        self.endPoint = Point2D(0,0)
-        self.slope = 0.0
-        self.xIntercept = 0.0
-        self.yIntercept = 0.0
-        
         # convert to point if it can, else raise an error
         if not isinstance(p1,Point2D):    # can only be a tuple or a list with two ints or floats, otherwise an error will be raised
             try:
@@ -62,21 +80,46 @@ class Segment2D(PlaneGeometryComponent):
         
         self.startPoint = p1
         self.endPoint = p2
+        self._slope = None    # not derived yet
         
+        
+    def _deriveLine(self):
+        '''Derive the slope and the intercepts of the line in which the segment exists.'''
         if self.startPoint.y==self.endPoint.y:    # vertical segment
-            self.slope = 0.0
-            self.xIntercept = None
-            self.yIntercept = 1.0*self.startPoint.y
+            self._slope = 0.0
+            self._xIntercept = None
+            self._yIntercept = 1.0*self.startPoint.y
         elif self.startPoint.x==self.endPoint.x:    # horizontal segment
-            self.slope = infinity
-            self.xIntercept = 1.0*self.startPoint.x
-            self.yIntercept = None
+            self._slope = infinity
+            self._xIntercept = 1.0*self.startPoint.x
+            self._yIntercept = None
         else:
-            self.slope = (self.endPoint.y*1.0-self.startPoint.y)/(self.endPoint.x*1.0-self.startPoint.x)
-            self.yIntercept = self.startPoint.y-self.slope*self.startPoint.x
-            self.xIntercept = 0-(1.0/self.slope)*self.yIntercept
+            self._slope = (self.endPoint.y*1.0-self.startPoint.y)/(self.endPoint.x*1.0-self.startPoint.x)
+            self._yIntercept = self.startPoint.y-self._slope*self.startPoint.x
+            self._xIntercept = 0-(1.0/self._slope)*self._yIntercept
             
             
+    @property
+    def slope(self):
+        if self._slope is None:
+            self._deriveLine()
+        return self._slope
+    
+    
+    @property
+    def xIntercept(self):
+        if self._slope is None:
+            self._deriveLine()
+        return self._xIntercept
+    
+    
+    @property
+    def yIntercept(self):
+        if self._slope is None:
+            self._deriveLine()
+        return self._yIntercept
+    
+    
     def __eq__(self,other):
         if not isinstance(other,Segment2D):
             raise GeometryTypeError("A non-segment object encountered when trying to determine equivalence of two segments.")
@@ -84,10 +127,135 @@ class Segment2D(PlaneGeometryComponent):
         return (self.startPoint==other.startPoint and self.endPoint==other.endPoint)
     
     
+    def __hash__(self):    # the same as '__eq__', segments with the same end points in reverse order are not equal
+        return hash((self.startPoint.x,self.startPoint.y,self.endPoint.x,self.endPoint.y))
+    
+    
+    __getstate__ = _getSlotsState
+    __setstate__ = _setSlotsState
+    
+    
     def __str__(self):
         return "Segment2D <%.2f, %.2f> <%.2f, %.2f>" %(self.startPoint.x,self.startPoint.y,self.endPoint.x,self.endPoint.y)
             
             
+def _floatBuffer(values):    # keep float64 arrays (array.array or numpy) as they are, copy anything else into one
+    if getattr(values,'typecode',None)=='d' or getattr(values,'dtype',None)=='float64':
+        return values
+    try:
+        return array('d',values)
+    except TypeError:
+        raise CoordinateNotDigitException("Invalid coordinates to construct a point array.")
+
+
+class PointArray(object):
+    '''Points stored as two contiguous columns of float64 coordinates. Point2D objects are created only when items
+    are read, and a slice is another point array.'''
+    
+    def __init__(self,xs=(),ys=None):    # receive the x-coordinates and the y-coordinates, or one flat sequence <x0, y0, x1, y1, ...>
+        if ys is None:
+            if len(xs)&1:
+                raise PolygonVertexNotCompleteException("Cannot construct a point array from an odd count of coordinates.")
+            ys = xs[1::2]
+            xs = xs[0::2]
+        if len(xs)!=len(ys):
+            raise PolygonVertexNotCompleteException("Cannot construct a point array as the count of x-coordinates and y-coordinates differ.")
+        
+        self.xs = _floatBuffer(xs)    # float64 buffers, shared rather than copied when they are already float64
+        self.ys = _floatBuffer(ys)
+        
+        
+    @classmethod
+    def fromPoints(cls,points):
+        '''Construct a point array from point objects, or tuples or lists with two floats.'''
+        xs = array('d')
+        ys = array('d')
+        for eachPoint in points:
+            if isinstance(eachPoint,Point2D):
+                xs.append(eachPoint.x)
+                ys.append(eachPoint.y)
+            else:
+                eachPoint = Point2D(eachPoint[0],eachPoint[1])
+                xs.append(eachPoint.x)
+                ys.append(eachPoint.y)
+        return cls(xs,ys)
+    
+    
+    def __len__(self):
+        return len(self.xs)
+    
+    
+    def __getitem__(self,index):
+        if isinstance(index,slice):
+            return PointArray(self.xs[index],self.ys[index])
+        return Point2D(float(self.xs[index]),float(self.ys[index]))
+    
+    
+    def __iter__(self):
+        xs = self.xs
+        ys = self.ys
+        for i in xrange(len(xs)):
+            yield Point2D(float(xs[i]),float(ys[i]))
+            
+            
+    def __str__(self):
+        return "PointArray <%d points>" %len(self)
+    
+    
+class SegmentArray(object):
+    '''Segments stored as two point arrays of start points and end points. Without end points the segments go around
+    the start points as a closed ring, the last one going back to the first point, and no coordinates are copied.'''
+    
+    def __init__(self,startPoints,endPoints=None):    # receive one or two point arrays
+        if not isinstance(startPoints,PointArray):
+            raise GeometryTypeError("A non-point-array object encountered when trying to construct a segment array.")
+        if endPoints is not None:
+            if not isinstance(endPoints,PointArray):
+                raise GeometryTypeError("A non-point-array object encountered when trying to construct a segment array.")
+            if len(startPoints)!=len(endPoints):
+                raise GeometryTypeError("Cannot construct a segment array as the count of start points and end points differ.")
+        
+        self.startPoints = startPoints
+        self.endPoints = endPoints
+        self.closed = endPoints is None    # a closed ring of segments over the start points
+        
+        
+    def _endIndex(self,index):
+        if self.closed:
+            return (index+1)%len(self.startPoints)
+        return index
+    
+    
+    def __len__(self):
+        return len(self.startPoints)
+    
+    
+    def __getitem__(self,index):
+        count = len(self.startPoints)
+        if isinstance(index,slice):
+            indexes = xrange(*index.indices(count))
+            starts = self.startPoints
+            ends = self.startPoints if self.closed else self.endPoints
+            return SegmentArray(PointArray([starts.xs[i] for i in indexes],[starts.ys[i] for i in indexes]),
+                                PointArray([ends.xs[self._endIndex(i)] for i in indexes],[ends.ys[self._endIndex(i)] for i in indexes]))
+        
+        if index<0:
+            index += count
+        if not 0<=index<count:
+            raise IndexError("segment array index out of range")
+        ends = self.startPoints if self.closed else self.endPoints
+        return Segment2D(self.startPoints[index],ends[self._endIndex(index)])
+    
+    
+    def __iter__(self):
+        for i in xrange(len(self.startPoints)):
+            yield self[i]
+            
+            
+    def __str__(self):
+        return "SegmentArray <%d segments>" %len(self)
+            
+            
 class Polygon2D(PlaneGeometryComponent):
     # edges could intersect with each other, and could partly coincide with each other. 
     # could still be counted as a 'generalized' polygon. So far.
@@ -97,6 +265,11 @@ class Polygon2D(PlaneGeometryComponent):
     def __init__(self,*pList):    # all parameters are in 'pList' tuple
         self.vertexList = []    # declare attributes here. HERE!
         self.edgeList = []
+        self.serial = next(_polygonSerials)    # unique among all polygons, unlike id() which can be reused
+        self.version = 0    # increased each time the polygon is invalidated
+        self._cache = {}    # values derived from the vertexes and edges, such as the edge index. Cleared when invalidated
+        vertexSet = set()    # the same vertexes and edges in sets, to find duplicates by hash rather than by scanning the lists
+        edgeSet = set()
         
         # pList is a list of floats, the count of which must be even
         if isinstance(pList[0],int) or isinstance(pList[0],float):
@@ -106,16 +279,18 @@ class Polygon2D(PlaneGeometryComponent):
             lastVertex = None
             for eachFloatIndex in xrange(0,len(pList),2):
                 thisVertex = Point2D(pList[eachFloatIndex],pList[eachFloatIndex+1])    # convert these two floats to a point object
-                if thisVertex in self.vertexList:
+                if thisVertex in vertexSet:
                     raise CoincidedPointsException("Cannot form a polygon with given parameters as the vertexes are coincided.")
                 self.vertexList += [thisVertex]
+                vertexSet.add(thisVertex)
                 if lastVertex:
                     if thisVertex==lastVertex:
                         continue    # skip overlapped points
                     thisEdge = Segment2D(lastVertex,thisVertex)    # in this case the last edge will not join into the edgeList
-                    if thisEdge in self.edgeList:
+                    if thisEdge in edgeSet:
                         raise CoincidedLinesException("Cannot form a polygon with given parameters as the edges are coincided.")
                     self.edgeList += [thisEdge]
+                    edgeSet.add(thisEdge)
                 lastVertex = thisVertex
                 
             finalVertex = Point2D(pList[-2],pList[-1])
@@ -131,16 +306,18 @@ class Polygon2D(PlaneGeometryComponent):
             lastVertex = None
             for eachPoint in pList:
                 thisVertex = Point2D(eachPoint[0],eachPoint[1])    # convert this tuple or list representing a point to a point object
-                if thisVertex in self.vertexList:
+                if thisVertex in vertexSet:
                     raise CoincidedPointsException("Cannot form a polygon with given parameters as the vertexes are coincided.")
                 self.vertexList += [thisVertex]
+                vertexSet.add(thisVertex)
                 if lastVertex:
                     if thisVertex==lastVertex:
                         continue    # skip overlapped points
                     thisEdge = Segment2D(lastVertex,thisVertex)
-                    if thisEdge in self.edgeList:
+                    if thisEdge in edgeSet:
                         raise CoincidedLinesException("Cannot form a polygon with given parameters as the edges are coincided.")
                     self.edgeList += [thisEdge]
+                    edgeSet.add(thisEdge)
                 lastVertex = thisVertex
                 
             finalVertex = Point2D(pList[-1][0],pList[-1][1])
@@ -155,39 +332,329 @@ class Polygon2D(PlaneGeometryComponent):
                 
             lastVertex = None
             for eachPoint in pList:
-                if eachPoint in self.vertexList:
+                if not isinstance(eachPoint,Point2D):
+                    raise GeometryTypeError("Can not form a polygon with the given parameters.")
+                if eachPoint in vertexSet:
                     raise CoincidedPointsException("Cannot form a polygon with given parameters as the vertexes are coincided.")
                 thisVertex = eachPoint
                 self.vertexList += [thisVertex]
+                vertexSet.add(thisVertex)
                 if lastVertex:
                     if thisVertex==lastVertex:
                         continue    # skip overlapped points
                     thisEdge = Segment2D(lastVertex,thisVertex)
-                    if thisEdge in self.edgeList:
+                    if thisEdge in edgeSet:
                         raise CoincidedLinesException("Cannot form a polygon with given parameters as the edges are coincided.")
                     self.edgeList += [thisEdge]
+                    edgeSet.add(thisEdge)
                 lastVertex = thisVertex
                 
             finalEdge = Segment2D(pList[-1],pList[0])
             self.edgeList += [finalEdge]    # fill on the final edge that goes from the final vertex to the first vertex
             
+        # pList is a single point array, wrapped without copying its coordinates
+        elif isinstance(pList[0],PointArray):
+            if len(pList)!=1:
+                raise GeometryTypeError("Can not form a polygon with more than one point array.")
+            points = pList[0]
+            if len(points)<3:
+                raise PolygonVertexNotCompleteException("Cannot construct a polygon from the parameters as not enough vertexex.")
+            
+            for eachCoordinate in zip(points.xs,points.ys):
+                if eachCoordinate in vertexSet:
+                    raise CoincidedPointsException("Cannot form a polygon with given parameters as the vertexes are coincided.")
+                vertexSet.add(eachCoordinate)
+                
+            self.vertexList = points    # vertexes and edges are made into objects only when read
+            self.edgeList = SegmentArray(points)
+            
         else:
             raise GeometryTypeError("Can not form a polygon with the given parameters.")
         
+        
+    @classmethod
+    def _fromTrustedPoints(cls,points,cache=None):
+        '''Wrap a point array already known to form a polygon, such as one that was saved, without checking it again.
+        cache holds values derived before, such as the bounding box.'''
+        polygon = cls.__new__(cls)
+        polygon.vertexList = points
+        polygon.edgeList = SegmentArray(points)
+        polygon.serial = next(_polygonSerials)
+        polygon.version = 0
+        polygon._cache = dict(cache) if cache else {}
+        return polygon
+        
                 
-    def __eq__(self,other):
+    def invalidate(self):
+        '''Drop everything derived from the vertexes and edges. Call it after changing vertexList or edgeList.'''
+        self.version += 1
+        self._cache = {}
+        
+        
+    def _toVertex(self,point):
+        if isinstance(point,Point2D):
+            return point
+        if isinstance(point,tuple) or isinstance(point,list):
+            return Point2D(point[0],point[1])
+        raise GeometryTypeError("Can not form a vertex of a polygon with the given parameter.")
+        
+        
+    def _prepareEdit(self):
+        '''Turn array-backed vertexes and edges into lists before the first edit, and get the coordinates of the
+        vertexes as a set, to find duplicates in O(1).'''
+        if isinstance(self.vertexList,PointArray):
+            self.vertexList = list(self.vertexList)
+            self.edgeList = list(self.edgeList)
+        vertexSet = self._cache.get('vertexSet')
+        if vertexSet is None:
+            vertexSet = set([(eachVertex.x,eachVertex.y) for eachVertex in self.vertexList])
+            self._cache['vertexSet'] = vertexSet
+        return vertexSet
+    
+    
+    def _setEdge(self,index,edge,insert=False):
+        '''Replace the edge at the index, or insert it before the index, along with its cached coordinates and its
+        entry in the edge index.'''
+        coordinates = self._cache.get('edgeCoordinates')
+        edgeIndex = self._cache.get('edgeIndex')
+        newCoordinates = (edge.startPoint.x,edge.startPoint.y,edge.endPoint.x,edge.endPoint.y)
+        if insert:
+            self.edgeList.insert(index,edge)
+            if coordinates is not None:
+                coordinates.insert(index,newCoordinates)
+        else:
+            if edgeIndex is not None:
+                oldEdge = self.edgeList[index]
+                edgeIndex.remove((oldEdge.startPoint.x,oldEdge.startPoint.y,oldEdge.endPoint.x,oldEdge.endPoint.y))
+            self.edgeList[index] = edge
+            if coordinates is not None:
+                coordinates[index] = newCoordinates
+        if edgeIndex is not None:
+            edgeIndex.insert(newCoordinates)
+            
+            
+    def _removeEdge(self,index):
+        coordinates = self._cache.get('edgeCoordinates')
+        edgeIndex = self._cache.get('edgeIndex')
+        oldEdge = self.edgeList.pop(index)
+        if coordinates is not None:
+            del coordinates[index]
+        if edgeIndex is not None:
+            edgeIndex.remove((oldEdge.startPoint.x,oldEdge.startPoint.y,oldEdge.endPoint.x,oldEdge.endPoint.y))
+            
+            
+    def _edited(self,removed=None,added=None):
+        '''Update what is cached after a vertex is removed or added or both: the bounding box is widened, or dropped
+        if the removed vertex was on it. The convexity is dropped, to be checked again when asked. A new version
+        tells the memoized results apart.'''
+        self.version += 1
+        for key in ('convex','convexFan','canonical','hash','grid','triangulation'):
+            self._cache.pop(key,None)
+        index = self._cache.get('edgeIndex')
+        if index is not None and index.isUneven():
+            del self._cache['edgeIndex']    # built again on the next query
+            
+        box = self._cache.get('boundingBox')
+        if box is not None:
+            minX,minY,maxX,maxY = box
+            if removed is not None and (removed.x in (minX,maxX) or removed.y in (minY,maxY)):
+                del self._cache['boundingBox']
+            elif added is not None:
+                self._cache['boundingBox'] = (min(minX,added.x),min(minY,added.y),max(maxX,added.x),max(maxY,added.y))
+                
+                
+    def _addArea(self,a,b,c,sign):
+        '''Add to the cached signed area the change from going a-c to going a-b-c, or the reverse if sign is -1.'''
+        area = self._cache.get('signedArea')
+        if area is not None:
+            change = (a.x*b.y-b.x*a.y)+(b.x*c.y-c.x*b.y)-(a.x*c.y-c.x*a.y)
+            self._cache['signedArea'] = area+sign*change/2.0
+            
+            
+    def insertVertex(self,index,point):
+        '''Insert a vertex before the vertex at the index, or after the final one if the index is the count of
+        vertexes. Only the edge it splits is replaced, and what is cached is updated rather than dropped.'''
+        vertexSet = self._prepareEdit()
+        count = len(self.vertexList)
+        if not 0<=index<=count:
+            raise IndexError("polygon vertex index out of range")
+        vertex = self._toVertex(point)
+        if (vertex.x,vertex.y) in vertexSet:
+            raise CoincidedPointsException("Cannot form a polygon with given parameters as the vertexes are coincided.")
+        
+        previous = self.vertexList[index-1]
+        following = self.vertexList[index%count]
+        self.vertexList.insert(index,vertex)
+        vertexSet.add((vertex.x,vertex.y))
+        self._setEdge(index-1 if index else count-1,Segment2D(previous,vertex))    # the edge from previous to following
+        self._setEdge(index,Segment2D(vertex,following),True)
+        self._addArea(previous,vertex,following,1)
+        self._edited(added=vertex)
+        
+        
+    def removeVertex(self,index):
+        '''Remove the vertex at the index, joining its two edges into one.'''
+        vertexSet = self._prepareEdit()
+        count = len(self.vertexList)
+        if not -count<=index<count:
+            raise IndexError("polygon vertex index out of range")
+        if count<=3:
+            raise PolygonVertexNotCompleteException("Cannot remove a vertex from a polygon of three vertexes.")
+        index %= count
+        
+        previous = self.vertexList[index-1]
+        vertex = self.vertexList[index]
+        following = self.vertexList[(index+1)%count]
+        del self.vertexList[index]
+        vertexSet.discard((vertex.x,vertex.y))
+        self._removeEdge(index)    # the edge from this vertex to following
+        self._setEdge(index-1 if index else count-2,Segment2D(previous,following))
+        self._addArea(previous,vertex,following,-1)
+        self._edited(removed=vertex)
+        
+        
+    def moveVertex(self,index,point):
+        '''Move the vertex at the index to the point, replacing its two edges.'''
+        vertexSet = self._prepareEdit()
+        count = len(self.vertexList)
+        if not -count<=index<count:
+            raise IndexError("polygon vertex index out of range")
+        index %= count
+        vertex = self._toVertex(point)
+        old = self.vertexList[index]
+        if (vertex.x,vertex.y)!=(old.x,old.y) and (vertex.x,vertex.y) in vertexSet:
+            raise CoincidedPointsException("Cannot form a polygon with given parameters as the vertexes are coincided.")
+        
+        previous = self.vertexList[index-1]
+        following = self.vertexList[(index+1)%count]
+        self.vertexList[index] = vertex
+        vertexSet.discard((old.x,old.y))
+        vertexSet.add((vertex.x,vertex.y))
+        self._setEdge(index-1 if index else count-1,Segment2D(previous,vertex))
+        self._setEdge(index,Segment2D(vertex,following))
+        self._addArea(previous,old,following,-1)
+        self._addArea(previous,vertex,following,1)
+        self._edited(removed=old,added=vertex)
+        
+        
+    def _getCoordinates(self):
+        '''Get the x-coordinates and the y-coordinates of the vertexes as two lists.'''
+        if isinstance(self.vertexList,PointArray):
+            return [float(x) for x in self.vertexList.xs],[float(y) for y in self.vertexList.ys]
+        return [eachVertex.x for eachVertex in self.vertexList],[eachVertex.y for eachVertex in self.vertexList]
+    
+    
+    def getBoundingBox(self):
+        '''Get the axis-aligned bounding box of the polygon as a tuple (minX, minY, maxX, maxY). Cached.'''
+        box = self._cache.get('boundingBox')
+        if box is None:
+            xs,ys = self._getCoordinates()
+            box = (min(xs),min(ys),max(xs),max(ys))
+            self._cache['boundingBox'] = box
+        return box
+    
+    
+    def getSignedArea(self):
+        '''Get the area of the polygon, positive if the vertexes go counterclockwise and negative if clockwise. Cached.'''
+        area = self._cache.get('signedArea')
+        if area is None:
+            xs,ys = self._getCoordinates()
+            area = 0.0
+            lastX = xs[-1]
+            lastY = ys[-1]
+            for i in xrange(len(xs)):    # shoelace formula, over each edge including the final one
+                area += lastX*ys[i]-xs[i]*lastY
+                lastX = xs[i]
+                lastY = ys[i]
+            area = area/2.0
+            self._cache['signedArea'] = area
+        return area
+    
+    
+    def getOrientation(self):
+        '''Get 1 if the vertexes go counterclockwise, -1 if clockwise, or 0 if the polygon has no area.'''
+        area = self.getSignedArea()
+        if area>0:
+            return 1
+        elif area<0:
+            return -1
+        return 0
+    
+    
+    def isConvex(self):
+        '''To determine whether the polygon is convex: it turns the same way at every vertex (or goes straight on),
+        and goes around only once. Cached.'''
+        convex = self._cache.get('convex')
+        if convex is None:
+            convex = self._checkConvex()
+            self._cache['convex'] = convex
+        return convex
+    
+    
+    def _checkConvex(self):
+        xs,ys = self._getCoordinates()
+        count = len(xs)
+        turning = 0.0    # total of the turning angles at all vertexes, 2*pi for a convex polygon
+        sign = 0
+        for i in xrange(count):
+            dx1 = xs[i]-xs[i-1]
+            dy1 = ys[i]-ys[i-1]
+            dx2 = xs[(i+1)%count]-xs[i]
+            dy2 = ys[(i+1)%count]-ys[i]
+            cross = dx1*dy2-dy1*dx2
+            dot = dx1*dx2+dy1*dy2
+            if cross==0:
+                if dot<0:
+                    return False    # the edge turns back on itself
+                continue
+            if sign==0:
+                sign = 1 if cross>0 else -1
+            elif (cross>0)!=(sign>0):
+                return False
+            turning += math.atan2(cross,dot)
+            
+        return sign!=0 and abs(abs(turning)-2*math.pi)<math.pi
+    
+    
+    def getCanonicalForm(self):
+        '''Get the vertexes as a tuple of tuples (x, y) in a canonical order: starting at the least vertex and going
+        on to the lesser of its two neighbours. Polygons with the same vertexes in the same cycle have the same form,
+        whichever vertex they start at and whichever way they go. Cached.'''
+        canonical = self._cache.get('canonical')
+        if canonical is None:
+            xs,ys = self._getCoordinates()
+            points = zip(xs,ys)
+            count = len(points)
+            first = points.index(min(points))    # vertexes are distinct, so the least one is the only one
+            if points[first-1]<points[(first+1)%count]:
+                points.reverse()
+                first = count-1-first
+            canonical = tuple(points[first:]+points[:first])
+            self._cache['canonical'] = canonical
+        return canonical
+    
+    
+    def __eq__(self,other):    # the same vertexes in the same cycle, in either direction
         if not isinstance(other,Polygon2D):
             raise GeometryTypeError("A non-polygon object encountered when trying to determine equivalence of two polygons.")
         
-        condition = 0
-        for eachEdge in self.edgeList:
-            if eachEdge not in other.edgeList:
-                condition += 1    # each vertex in this polygon is in other polygon
-        for eachEdge in other.edgeList:
-            if eachEdge not in self.edgeList:
-                condition += 1    # each vertex in other polygon is in this polygon
-                
-        return (not condition)
+        if self is other:
+            return True
+        if len(self.vertexList)!=len(other.vertexList) or hash(self)!=hash(other):
+            return False
+        return self.getCanonicalForm()==other.getCanonicalForm()
+    
+    
+    def __hash__(self):    # the same as '__eq__'. Do not edit a polygon while it is in a set or a dict
+        value = self._cache.get('hash')
+        if value is None:
+            value = hash(self.getCanonicalForm())
+            self._cache['hash'] = value
+        return value
+    
+    
+    def __ne__(self,other):    # python 2 does not derive it from '__eq__'
+        return not self==other
     
     
     def __str__(self):
@@ -216,4 +683,5 @@ if __name__=='__main__':
     pg1 = Polygon2D(p1,p2,p3,p4,p5,p6)
     pg2 = Polygon2D(p1,p2,p3,p6,p5,p4)
     print pg1
-    print pg1==pg2
\ No newline at end of file
+    print pg1==pg2
+    print pg1==Polygon2D(p4,p3,p2,p1,p6,p5),len(set([pg1,pg2,Polygon2D(p3,p4,p5,p6,p1,p2)]))
\ No newline at end of file
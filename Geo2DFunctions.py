@@ -4,12 +4,52 @@
 # functions such as determine whether a point is in a segment, or two lines are horizontal or vertical,
 # or a point is in a polygon 
 
+import heapq
 import math
+from fractions import Fraction
 
 from Geo2DExceptions import *
 from Geo2DElements import *
+from Geo2DIndex import getCandidateEdgeCoordinates
+from Geo2DCache import memoize
+from Geo2DPredicates import crossSign,exactCrossSign,exactOrientation,errorBound,isExactMode
+from Geo2DKernels import (pointInSegment,linesParallel,linesVertical,pointDistance,pointLineDistance,
+                          parallelLineDistance,lineIntersect,horizontalIntersectX,verticalIntersectY,
+                          pointInPolygon,pointInConvexFan,segmentIntersect)
+
+
+sweepPairsPerSegment = 32    # see 'findAllIntersections()', pairs looked at for each segment or pair found, per level of log n
         
 
+def _elementKey(e):    # coordinates of a point or a segment, as a part of a cache key
+    if isinstance(e,Point2D):
+        return (e.x,e.y)
+    if isinstance(e,Segment2D):
+        return (e.startPoint.x,e.startPoint.y,e.endPoint.x,e.endPoint.y)
+    return None
+
+
+def _distanceKey(e1,e2):
+    k1 = _elementKey(e1)
+    k2 = _elementKey(e2)
+    if k1 is None or k2 is None:
+        return None    # not cached, let 'getDistance()' raise its error
+    return ('getDistance',k1,k2,isExactMode())    # results differ between the modes
+
+
+def _intersectKey(s1,s2,onLine=0):
+    if not (isinstance(s1,Segment2D) and isinstance(s2,Segment2D)):
+        return None
+    return ('getIntersect',_elementKey(s1),_elementKey(s2),bool(onLine),isExactMode())
+
+
+def _inPolygonKey(p,polygon):
+    if not (isinstance(p,Point2D) and isinstance(polygon,Polygon2D)):
+        return None
+    # a changed polygon is invalidated to a new version
+    return ('isInPolygon',p.x,p.y,polygon.serial,polygon.version,isExactMode())
+
+
 def isInSegment(p,e):
     '''To determine whether a point is on a line segment. End point of the segment included.'''
     
@@ -18,32 +58,7 @@ def isInSegment(p,e):
     if not isinstance(e,Segment2D):
         raise GeometryTypeError("A non-segment object encountered in function 'isInSegment()'.")
     
-    # if the segment is vertical or horizontal
-    if e.slope==0:    # horizontal
-        return p.y==e.startPoint.y and (e.startPoint.x<=p.x<=e.endPoint.x or e.endPoint.x<=p.x<=e.startPoint.x)
-    elif e.slope==infinity:    # vertical
-        return p.x==e.startPoint.x and (e.startPoint.y<=p.y<=e.endPoint.y or e.endPoint.y<=p.y<=e.startPoint.y)
-    
-    # if the point is the start point or end point of the segment
-    if p==e.startPoint or p==e.endPoint:
-        return True
-    
-    # if the point and the segment start point have either the same x displace or y displace, to avoid ZeroDivisionError
-    if p.x==e.startPoint.x:
-        return p.y==e.startPoint.y
-    if p.y==e.startPoint.y:
-        return p.x==e.startPoint.x
-    
-    # other circumstances
-    c1 = ((e.endPoint.x-p.x)/(p.x-e.startPoint.x)==(e.endPoint.y-p.y)/(p.y-e.startPoint.y))    # this point is on the line in which the segment exists
-    
-    minX = min(e.startPoint.x,e.endPoint.x)
-    maxX = max(e.startPoint.x,e.endPoint.x)
-    minY = min(e.startPoint.y,e.endPoint.y)
-    maxY = max(e.startPoint.y,e.endPoint.y)
-    c2 = (minX<=p.x<=maxX and minY<=p.y<=maxY)
-            
-    return c1 and c2
+    return pointInSegment(p.x,p.y,e.startPoint.x,e.startPoint.y,e.endPoint.x,e.endPoint.y)
 
 
 def isParallel(l1,l2):
@@ -52,10 +67,8 @@ def isParallel(l1,l2):
         raise GeometryTypeError("Error encountered in determine parallel-ness. First parameter is not a segment or line.")
     elif not isinstance(l2,Segment2D):
         raise GeometryTypeError("Error encountered in determine parallel-ness. Second parameter is not a segment or line.")
-    elif l1.yIntercept==l2.yIntercept and l1.xIntercept==l2.xIntercept:    # a str ('infinity') and a float can compare
-        raise CoincidedLinesException("Two lines are coincide.")
-    else:
-        return l1.slope==l2.slope# and l1.yIntercept!=l2.yIntercept and l1.xIntercept!=l2.xIntercept
+    return linesParallel(l1.startPoint.x,l1.startPoint.y,l1.endPoint.x,l1.endPoint.y,
+                         l2.startPoint.x,l2.startPoint.y,l2.endPoint.x,l2.endPoint.y)
     
     
 def isVertical(l1,l2):
@@ -64,83 +77,28 @@ def isVertical(l1,l2):
         raise GeometryTypeError("Error encountered in determine vertical-ness. First parameter is not a segment or line.")
     elif not isinstance(l2,Segment2D):
         raise GeometryTypeError("Error encountered in determine vertical-ness. Second parameter is not a segment or line.")
-    elif l1.yIntercept==l2.yIntercept and l1.xIntercept==l2.xIntercept:    # a str ('infinity') and a float can compare
-        raise CoincidedLinesException("Two lines are coincide.")
-    elif l1.slope==0 and l2.slope==infinity:
-        return True
-    elif l1.slope==infinity and l2.slope==0:
-        return True
-    else:
-        return l1.slope*l2.slope==-1
+    return linesVertical(l1.startPoint.x,l1.startPoint.y,l1.endPoint.x,l1.endPoint.y,
+                         l2.startPoint.x,l2.startPoint.y,l2.endPoint.x,l2.endPoint.y)
 
 
+@memoize(_distanceKey)
 def getDistance(e1,e2):    # could be either of two points or two lines, or a mixture of the two
     '''Get distance between two points or two parallel lines or a point to a line.'''
     
     if isinstance(e1,Point2D):
         if isinstance(e2,Point2D):    # generate the distance between two points
-            dx = float(e1.x)-e2.x
-            dy = float(e1.y)-e2.y
-            return math.sqrt(dx*dx+dy*dy)
-    
-        elif isinstance(e2,Segment2D):    #     # generate the distance of a segment to a point, where a segment is equal to a line
-            if e2.slope==0:
-                return abs(e1.y-e2.startPoint.y)
-            elif e2.slope==infinity:
-                return abs(e1.x-e2.startPoint.x)
-            else:
-                k1 = e2.slope
-                b1 = e2.yIntercept
-                k2 = -1.0/k1      # k2 and b2 are to describe the vertical line to e2
-                b2 = e1.y-e1.x*k2
-                _x = (b2-b1)/(k2-k1)
-                _y = k2*_x+b2    # _x and _y are the coordinates of the intersect
-                dx = e1.x-_x
-                dy = e1.y-_y
-                return math.sqrt(dx*dx+dy*dy)
-            
+            return pointDistance(e1.x,e1.y,e2.x,e2.y)
+        elif isinstance(e2,Segment2D):    # generate the distance of a segment to a point, where a segment is equal to a line
+            return pointLineDistance(e1.x,e1.y,e2.startPoint.x,e2.startPoint.y,e2.endPoint.x,e2.endPoint.y)
         else:
             raise GeometryTypeError("Could not generate distance with given parameters (second one).")
     
     elif isinstance(e1,Segment2D):
         if isinstance(e2,Point2D):    # generate the distance of a line to a point
-            if e1.slope==0:
-                return abs(e1.startPoint.y-e2.y)
-            elif e1.slope==infinity:
-                return abs(e1.startPoint.x-e2.x)
-            else:
-                k1 = e1.slope
-                b1 = e1.yIntercept
-                k2 = -1.0/k1
-                b2 = e2.y-e2.x*k2
-                _x = (b2-b1)/(k2-k1)
-                _y = k2*_x+b2
-                dx = e2.x-_x
-                dy = e2.y-_y
-                return math.sqrt(dx*dx+dy*dy)
-        
+            return pointLineDistance(e2.x,e2.y,e1.startPoint.x,e1.startPoint.y,e1.endPoint.x,e1.endPoint.y)
         elif isinstance(e2,Segment2D):    # generate the distance of two parallel lines
-            if e1.slope!=e2.slope:
-                raise CrossingLinesNoDistanceError("Two given lines are not parallel, and thus they have no distance.")
-            elif e1.slope==0:
-                return abs(e1.startPoint.y-e2.startPoint.y)
-            elif e1.slope==infinity:
-                return abs(e1.startPoint.x-e2.startPoint.x)
-            else:
-                #k11 = e1.slope     # k11 and b11 are to describe the e1 segment
-                #b11 = e1.yIntercept
-                #k12 = e2.slope          # k12 and b12 are to describe the e2 segment
-                #b12 = e2.yIntercept
-                x1 = 2.0
-                y1 = x1*e1.slope+e1.yIntercept    # x1 and y1 are the coordinates if a point (2.0, y1) on the e1 segment
-                k2 = -1.0/e1.slope
-                b2 = y1-k2*x1                     # k2 and b2 are to describe the vertical line
-                x2 = (e2.yIntercept-b2)/(e2.slope-k2)
-                y2 = e2.slope*x2+e2.yIntercept
-                dx = x2-x1
-                dy = y2-y1
-                return math.sqrt(dx*dx+dy*dy)
-            
+            return parallelLineDistance(e1.startPoint.x,e1.startPoint.y,e1.endPoint.x,e1.endPoint.y,
+                                        e2.startPoint.x,e2.startPoint.y,e2.endPoint.x,e2.endPoint.y)
         else:
             raise GeometryTypeError("Could not generate distance with given parameters (second one).")
             
@@ -148,35 +106,16 @@ def getDistance(e1,e2):    # could be either of two points or two lines, or a mi
         raise GeometryTypeError("Could not generate distance with given parameters (first one).")
 
 
+@memoize(_intersectKey,store=lambda p:(p.x,p.y),restore=lambda xy:Point2D(xy[0],xy[1]))
 def getIntersect(s1,s2,onLine=0):
     '''receive two segment objects, 3rd parameter is to decide whether intersect on the line but not the segment is acceptable.'''
     if not isinstance(s1,Segment2D):
         raise GeometryTypeError("A non-segment object encountered as the first parameter to get the intersect.")
     if not isinstance(s2,Segment2D):
         raise GeometryTypeError("A non-segment object encountered as the second parameter to get the intersect.")
-    if isParallel(s1,s2):
-        raise ParallelLineException("Cannot get intersection of the two segments as they are parallel.")
-    
-    if not s1.yIntercept:    # s1 is vertical
-        _intersect = Point2D(s1.startPoint.x,s2.slope*s1.startPoint.x+float(s2.yIntercept))
-    elif not s2.yIntercept:    # s2 is vertical
-        _intersect = Point2D(s2.startPoint.x,s1.slope*s2.startPoint.x+float(s1.yIntercept))
-    else:
-        k1 = float(s1.slope)
-        b1 = float(s1.yIntercept)
-        k2 = float(s2.slope)
-        b2 = float(s2.yIntercept)
-        x = -(b2-b1)/(k2-k1)
-        y = k1*x+b1
-        _intersect = Point2D(x,y)
-    
-    if isInSegment(_intersect,s1) and isInSegment(_intersect,s2):
-        return _intersect
-    else:
-        if onLine:
-            return _intersect
-        else:
-            raise NoIntersectError("Given segments have an intersect not in either of the segments.")
+    x,y = lineIntersect(s1.startPoint.x,s1.startPoint.y,s1.endPoint.x,s1.endPoint.y,
+                        s2.startPoint.x,s2.startPoint.y,s2.endPoint.x,s2.endPoint.y,onLine)
+    return Point2D(x,y)
 
 
 def getIntersect_horizontal(p,e):    # this function is only used in "isInPolygon" function. It should not be uesd else where.
@@ -187,22 +126,7 @@ def getIntersect_horizontal(p,e):    # this function is only used in "isInPolygo
     if not isinstance(e,Segment2D):
         raise GeometryTypeError("A non-segment object encountered in function 'isInSegment()'.")
     
-    #if e.slope==0:
-    #    raise HorizontalLineException("This line is horizontal. No intersect can be found.")
-    # 
-    #minY = min(e.startPoint.y,e.endPoint.y)
-    #maxY = max(e.startPoint.y,e.endPoint.y)
-    #if minY>p.y or maxY<p.y:
-    #    raise NoIntersectError("No intersect between horizontal line through this point and the segment.")
-    # these two conditions are excluded in 'isInPolygon' function before call this function
-    
-    if p.y==e.startPoint.y:
-        return e.startPoint    # the intersect is the start point of the segment
-    
-    if e.yIntercept:    # has a valid y-axis intercept
-        return Point2D((p.y-e.yIntercept)/e.slope,p.y)
-    else:    # vertical edge
-        return Point2D(e.startPoint.x,p.y)
+    return Point2D(horizontalIntersectX(p.y,e.startPoint.x,e.startPoint.y,e.endPoint.x,e.endPoint.y),p.y)
 
 
 def getIntersect_vertical(p,e):    # this function is only used in "isInPolygon" function. It should not be uesd else where.
@@ -213,15 +137,28 @@ def getIntersect_vertical(p,e):    # this function is only used in "isInPolygon"
     if not isinstance(e,Segment2D):
         raise GeometryTypeError("A non-segment object encountered in function 'isInSegment()'.")
     
-    if p.x==e.startPoint.x:
-        return e.startPoint    # the intersect is the start point of the segment
-    
-    if e.xIntercept:
-        return Point2D(p.x,e.yIntercept+e.slope*p.x)
-    else:
-        return Point2D(p.x,e.startPoint.y)
+    return Point2D(p.x,verticalIntersectY(p.x,e.startPoint.x,e.startPoint.y,e.endPoint.x,e.endPoint.y))
 
 
+def _getConvexFan(polygon):
+    '''Get the vertexes of a convex polygon in their own order, starting at a corner, with the indexes of the corners
+    (those where it does not go straight on) and 1 if it goes counterclockwise or -1 if clockwise. Cached in the
+    polygon.'''
+    fan = polygon._cache.get('convexFan')
+    if fan is None:
+        xs,ys = polygon._getCoordinates()
+        count = len(xs)
+        turns = [crossSign(xs[i-1],ys[i-1],xs[i],ys[i],xs[i],ys[i],xs[(i+1)%count],ys[(i+1)%count]) for i in xrange(count)]
+        first = [i for i in xrange(count) if turns[i]!=0][0]
+        xs = xs[first:]+xs[:first]
+        ys = ys[first:]+ys[:first]
+        turns = turns[first:]+turns[:first]
+        fan = (xs,ys,[i for i in xrange(count) if turns[i]!=0],turns[0])
+        polygon._cache['convexFan'] = fan
+    return fan
+
+
+@memoize(_inPolygonKey)
 def isInPolygon(p,polygon):
     '''To determine whether a point is in a polygon, including its edge.'''
     
@@ -230,81 +167,224 @@ def isInPolygon(p,polygon):
     if not isinstance(polygon,Polygon2D):
         raise GeometryTypeError("A non-polygon object encountered in function 'isInPolygon()'.")
     
-    intersectHorizontal_infinite = 0
-    intersectVertical_infinite = 0
-    intersectsUp = 0
-    intersectsUp_infinite = 0    # an edge is vertical so there are actually infinite intersects
-    intersectsDown = 0
-    intersectsDown_infinite = 0
-    intersectsRight = 0
-    intersectsRight_infinite = 0    # an edge is horizontal se there are actually infinite intersects
-    intersectsLeft = 0
-    intersectsLeft_infinite = 0
+    minX,minY,maxX,maxY = polygon.getBoundingBox()
+    if not (minX<=p.x<=maxX and minY<=p.y<=maxY):
+        return False    # out of the bounding box, so the polygon is on one side of this point only
     
-    for thisEdge in polygon.edgeList:     # segments of the polygon one by one   
-        if isInSegment(p,thisEdge):    # if this point is on the edge of the polygon:
-            return True
-        
-        intersect = None
-        intersect_infinite = None
-        
-        if (thisEdge.startPoint.y-p.y)*(thisEdge.endPoint.y-p.y) <= 0:    # cast a horizontal line
-            if thisEdge.slope==0:    # this edge is horizontal. only happens if the edge is a part of the horizontal line, in which case there are infinite intersects
-                intersect_infinite = thisEdge.startPoint
-            else:
-                if p.y==thisEdge.endPoint.y:    # exclude end point of each edge, to avoid repeat
-                    intersect = None
-                else:
-                    intersect = getIntersect_horizontal(p,thisEdge)
-                    
-            if intersect:    # the horizontal line through this point has an intersect with this edge
-                if intersect.x<p.x:
-                    intersectsLeft += 1
-                else:
-                    intersectsRight += 1
+    grid = polygon._cache.get('grid')
+    if grid is not None:
+        return grid.contains(p.x,p.y)    # compiled by 'compilePolygonGrid()'
+    if polygon.isConvex():
+        return pointInConvexFan(p.x,p.y,_getConvexFan(polygon))
+    
+    # only the edges a horizontal line through this point may meet are counted
+    return pointInPolygon(p.x,p.y,getCandidateEdgeCoordinates(p.y,polygon))
+    
+    
+def _exactMeet(first,second):
+    '''Get the point where two segments given as their end points (left, right) meet, exactly, in floats if it is
+    an end point and in fractions if not. None if they do not meet, or are parallel.'''
+    (x1,y1),(x2,y2) = first
+    (x3,y3),(x4,y4) = second
+    sides = (exactOrientation(x1,y1,x2,y2,x3,y3),exactOrientation(x1,y1,x2,y2,x4,y4),
+             exactOrientation(x3,y3,x4,y4,x1,y1),exactOrientation(x3,y3,x4,y4,x2,y2))
+    if sides[0]*sides[1]>0 or sides[2]*sides[3]>0 or sides[0]==sides[1]==0:
+        return None    # on one side of the other one, or on the same line
+    if sides[0]==0:
+        return second[0]
+    elif sides[1]==0:
+        return second[1]
+    elif sides[2]==0:
+        return first[0]
+    elif sides[3]==0:
+        return first[1]
+    
+    F = Fraction
+    x1,y1,x2,y2,x3,y3,x4,y4 = F(x1),F(y1),F(x2),F(y2),F(x3),F(y3),F(x4),F(y4)
+    t = ((x3-x1)*(y4-y3)-(y3-y1)*(x4-x3))/((x2-x1)*(y4-y3)-(y2-y1)*(x4-x3))
+    return (x1+t*(x2-x1),y1+t*(y2-y1))
+
+
+def _findByBoxes(coordinates,pairsPerLevel):
+    '''Find the pairs of segments that meet by sweeping a vertical line from left to right. Only segments whose
+    x-ranges contain the line (the active ones) and whose y-ranges overlap are tested against each other.
+    Give up and return None once more than pairsPerLevel active pairs for each segment and each pair found, per level
+    of log n, have been looked at.'''
+    minXs = [min(c[0],c[2]) for c in coordinates]
+    maxXs = [max(c[0],c[2]) for c in coordinates]
+    minYs = [min(c[1],c[3]) for c in coordinates]
+    maxYs = [max(c[1],c[3]) for c in coordinates]
+    count = len(coordinates)
+    levels = math.log(count+1,2)
+    
+    found = []
+    looked = 0
+    active = set()
+    leaving = []    # heap of (maxX, index) of the active segments
+    for i in sorted(xrange(len(coordinates)),key=minXs.__getitem__):
+        x = minXs[i]
+        while leaving and leaving[0][0]<x:
+            active.discard(heapq.heappop(leaving)[1])
+            
+        looked += len(active)
+        if looked>pairsPerLevel*(count+len(found))*levels:
+            return None
+        minY = minYs[i]
+        maxY = maxYs[i]
+        for j in active:
+            if minYs[j]<=maxY and maxYs[j]>=minY:
+                low,high = (i,j) if i<j else (j,i)    # the lower index first, as in '_findBySweepLine()'
+                intersect = segmentIntersect(*(coordinates[low]+coordinates[high]))
+                if intersect is not None:
+                    found.append((low,high,Point2D(intersect[0],intersect[1])))
                     
-            if intersect_infinite:
-                if intersect_infinite.x<p.x:
-                    intersectsLeft_infinite += 1
-                else:
-                    intersectsRight_infinite += 1
-                
-        if (thisEdge.startPoint.x-p.x)*(thisEdge.endPoint.x-p.x) <= 0:    # cast a vertical line
-            if thisEdge.slope==infinity:    # this edge is vertical. only happens if the edge is on the vertical line, in which case there are infinite intersects
-                intersect_infinite = thisEdge.startPoint    # then the start point of the edge is counted as the only intersect
+        active.add(i)
+        heapq.heappush(leaving,(maxXs[i],i))
+    return found
+
+
+def _findBySweepLine(coordinates):
+    '''Find the pairs of segments that meet by a Bentley-Ottmann sweep, in O((n+k) log n) predicates for n segments
+    and k pairs. The segments the sweep line crosses are kept in a list in their order along it, and events are
+    decided with exact predicates, an intersect being kept in fractions, so that rounding never puts the list out of
+    order. Out of exact mode, the pairs 'getIntersect()' finds meeting only by rounding, at an end point, are found
+    too.'''
+    # the sweep line goes from left to right, and from bottom to top along a vertical line. Each segment is added to
+    # the line at its left end point and removed at its right one, those being the events to begin with
+    ends = []    # (left, right) end points of each segment
+    events = {}    # segments starting at each end point
+    for i,(x1,y1,x2,y2) in enumerate(coordinates):
+        left,right = sorted(((x1,y1),(x2,y2)))
+        ends.append((left,right))
+        if left!=right:    # a segment of no length is parallel to every other one
+            events.setdefault(left,[]).append(i)
+            events.setdefault(right,[])
+    # an event in the queue is (rounded x, x, rounded y, y), followed by the two segments meeting there for an
+    # intersect. Rounding keeps the order, so that fractions are only compared when the rounded coordinates are equal
+    queue = [(float(x),x,float(y),y) for x,y in events]
+    heapq.heapify(queue)
+    
+    def side(i,point,known=()):    # 1 if the point is above segment i, -1 if below, 0 if on it
+        if i in known:
+            return 0
+        (x1,y1),(x2,y2) = ends[i]
+        return exactOrientation(x1,y1,x2,y2,point[0],point[1])
+    
+    def turn(i,j):    # 1 if segment j goes up more steeply than segment i
+        (x1,y1),(x2,y2) = ends[i]
+        (x3,y3),(x4,y4) = ends[j]
+        return exactCrossSign(x1,y1,x2,y2,x3,y3,x4,y4)
+    
+    def schedule(i,j,event):    # two segments next to each other meeting after the event make another one
+        meet = _exactMeet(ends[i],ends[j])
+        if meet is not None:
+            x,y = meet
+            roundedX = float(x)
+            roundedY = float(y)
+            if type(x) is Fraction and x==roundedX:
+                x = roundedX    # so that it is found among the end points
+            if type(y) is Fraction and y==roundedY:
+                y = roundedY
+            scheduled = (roundedX,x,roundedY,y,i,j)
+            if scheduled[:4]>event[:4]:
+                heapq.heappush(queue,scheduled)    # the same intersect may be pushed more than once
+    
+    def near(i,j,event):    # whether the event may be on segment i by rounding, as an end point of segment j
+        (x1,y1),(x2,y2) = ends[i]
+        (x3,y3),(x4,y4) = ends[j]
+        left = (x2-x1)*(event[2]-y1)
+        right = (y2-y1)*(event[0]-x1)
+        scale = abs(left)+abs(right)+abs((x2-x1)*(y4-y3))+abs((y2-y1)*(x4-x3))
+        return abs(left-right)<=8*errorBound*scale
+    
+    exact = isExactMode()
+    found = []
+    tested = {}    # whether each pair tested meets, as segments on the same line may meet at several events
+    
+    def test(i,j):    # the lower index first, so that the intersect is the same as 'getIntersect()'
+        if i>j:
+            i,j = j,i
+        if (i,j) not in tested:
+            intersect = segmentIntersect(*(coordinates[i]+coordinates[j]))
+            tested[(i,j)] = intersect is not None
+            if intersect is not None:
+                found.append((i,j,Point2D(intersect[0],intersect[1])))
+        return tested[(i,j)]
+    
+    line = []    # the segments the sweep line crosses, from bottom to top
+    while queue:
+        event = heapq.heappop(queue)
+        known = set(event[4:])    # segments known to go through the point
+        while queue and queue[0][:4]==event[:4]:
+            known.update(heapq.heappop(queue)[4:])
+        point = (event[1],event[3])
+        atEnd = type(point[0]) is not Fraction and type(point[1]) is not Fraction
+        starting = events.pop(point,[]) if atEnd else []
+        
+        low = 0    # the first segment not below the point
+        high = len(line)
+        while low<high:
+            middle = (low+high)>>1
+            if side(line[middle],point,known)>0:
+                low = middle+1
             else:
-                if p.x==thisEdge.endPoint.x:    # exclude end point of each edge, to avoid repeat
-                    intersect = None
-                else:
-                    intersect = getIntersect_vertical(p,thisEdge)
-                
-            if intersect:
-                if intersect.y<p.y:
-                    intersectsDown += 1
-                else:
-                    intersectsUp += 1
-                    
-            if intersect_infinite:
-                if intersect_infinite.y<p.y:
-                    intersectsDown_infinite += 1
-                else:
-                    intersectsUp_infinite += 1
-                    
-    if intersectsRight_infinite:     # if on right side there is edge(s) coincident with the line
-        if not intersectsRight&1:    # if it's even
-            intersectsRight += 1      # then change to odd
-    if intersectsLeft_infinite:
-        if not intersectsLeft&1:
-            intersectsLeft += 1
-    if intersectsUp_infinite:
-        if not intersectsUp&1:
-            intersectsUp += 1
-    if intersectsDown_infinite:
-        if not intersectsDown&1:
-            intersectsDown += 1
+                high = middle
+        top = low    # the segments through the point are next to each other
+        while top<len(line) and side(line[top],point,known)==0:
+            top += 1
+        through = line[low:top]
+        
+        meeting = starting+through
+        for a in xrange(len(meeting)):
+            for b in xrange(a+1,len(meeting)):
+                test(meeting[a],meeting[b])
+        # out of exact mode, an end point off a segment by less than rounding may still be found on it by
+        # 'segmentIntersect()'. Such segments are next to the point on the line, so they are tested going down and
+        # up from it while they meet or are that close to it
+        if not exact:
+            for each in meeting:
+                k = low-1
+                while k>=0 and (test(line[k],each) or near(line[k],each,event)):
+                    k -= 1
+                k = top
+                while k<len(line) and (test(line[k],each) or near(line[k],each,event)):
+                    k += 1
+        
+        # the segments going on from the point, in their order right after it, from the least steep one
+        going = starting+[i for i in through if not (atEnd and ends[i][1]==point)]
+        going.sort(cmp=lambda i,j:-turn(i,j))
+        line[low:top] = going
+        if going:
+            if low>0:
+                schedule(line[low-1],going[0],event)
+            if low+len(going)<len(line):
+                schedule(going[-1],line[low+len(going)],event)
+        elif 0<low<len(line):
+            schedule(line[low-1],line[low],event)
+    
+    return found
+
+
+def findAllIntersections(segments):
+    '''Find every pair of segments that meet, end points included. Parallel segments are skipped, as in 'getIntersect()'.
+    Return a list of tuples (i, j, intersect) with i<j the indexes of the two segments, sorted by i and j, and the
+    intersect the same as 'getIntersect()' of segment i and segment j.
+    The segments are first tested pair by pair in a sweep over their boxes, the faster one while the pairs looked at
+    are not many more than those found. Past 'sweepPairsPerSegment' pairs looked at for each segment and each pair
+    found, per level of log n, as with many segments overlapping in x and y without meeting, the pairs are found by
+    the Bentley-Ottmann sweep instead, in O((n+k) log n).'''
+    
+    coordinates = []
+    for eachSegment in segments:
+        if not isinstance(eachSegment,Segment2D):
+            raise GeometryTypeError("A non-segment object encountered in function 'findAllIntersections()'.")
+        coordinates.append((eachSegment.startPoint.x,eachSegment.startPoint.y,eachSegment.endPoint.x,eachSegment.endPoint.y))
     
-    c1 =  intersectsUp&1 and intersectsDown&1 and intersectsLeft&1 and intersectsRight&1
-    return bool(c1)#,intersectsUp,intersectsDown,intersectsLeft,intersectsRight
+    found = _findByBoxes(coordinates,sweepPairsPerSegment)
+    if found is None:
+        found = _findBySweepLine(coordinates)
+    found.sort(key=lambda each:(each[0],each[1]))
+    return found
     
     
 
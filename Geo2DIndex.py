@@ -0,0 +1,600 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# index structures to speed up repeated queries against geometry objects
+
+import bisect
+import heapq
+import math
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+from Geo2DKernels import edgeCoordinates,pointInPolygon
+
+
+edgeIndexMinEdges = 32    # polygons with fewer edges are not worth an index, their edges are simply scanned
+rTreeNodeCapacity = 16    # count of children in each node of an r-tree
+kdTreeLeafSize = 16    # count of points in each leaf of a kd-tree, which are simply scanned
+gridCellsPerEdge = 4    # count of cells of a polygon grid for each edge of the polygon, by default
+gridMemoryBudget = 64<<20    # bytes a polygon grid may take, by default
+gridEntryBytes = 64    # bytes taken for each edge in each cell it crosses, by estimate
+
+
+class IntervalTree(object):
+    '''A centered interval tree over closed intervals [low, high]. A query returns the items of the intervals
+    containing a value, in O(log n + k). Intervals can be inserted and removed after the tree is built, without
+    rebalancing it: 'edits' counts them, so that a tree can be built again once they have made it uneven.'''
+
+    def __init__(self,lows,highs,items=None):    # receive two sequences of floats, the i-th interval is [lows[i], highs[i]]
+        self.count = 0
+        self.edits = 0
+        self.root = None
+
+        if len(lows)!=len(highs):
+            raise GeometryTypeError("Cannot build an interval tree as the count of low ends and high ends differ.")
+        if items is None:
+            items = range(len(lows))    # the item of an interval is its index by default
+        elif len(items)!=len(lows):
+            raise GeometryTypeError("Cannot build an interval tree as the count of items and intervals differ.")
+        self.count = len(lows)
+        self.root = self._build(range(self.count),lows,highs,items)
+
+
+    def _build(self,indexes,lows,highs,items):
+        if not indexes:
+            return None
+
+        ends = sorted([lows[i] for i in indexes]+[highs[i] for i in indexes])
+        center = ends[len(ends)>>1]
+
+        leftIndexes = []
+        rightIndexes = []
+        here = []
+        for i in indexes:
+            if highs[i]<center:
+                leftIndexes.append(i)
+            elif lows[i]>center:
+                rightIndexes.append(i)
+            else:
+                here.append(i)
+
+        byLow = sorted([(lows[i],items[i]) for i in here])
+        byHigh = sorted([(-highs[i],items[i]) for i in here])    # by descending high end
+        return [center,byLow,byHigh,self._build(leftIndexes,lows,highs,items),self._build(rightIndexes,lows,highs,items)]
+
+
+    def _findNode(self,low,high,create):
+        '''Get the node an interval belongs to, the first one down the tree whose center it contains. Missing nodes
+        are created if asked, or else None is returned.'''
+        parent = None
+        node = self.root
+        while True:
+            if node is None:
+                if not create:
+                    return None
+                node = [(low+high)/2.0,[],[],None,None]
+                if parent is None:
+                    self.root = node
+                else:
+                    parent[3 if high<parent[0] else 4] = node
+                return node
+            if high<node[0]:
+                parent,node = node,node[3]
+            elif low>node[0]:
+                parent,node = node,node[4]
+            else:
+                return node
+
+
+    def insert(self,low,high,item):
+        '''Add the interval [low, high] with its item, in O(log n + k) for k intervals in its node.'''
+        node = self._findNode(low,high,True)
+        bisect.insort(node[1],(low,item))
+        bisect.insort(node[2],(-high,item))
+        self.count += 1
+        self.edits += 1
+
+
+    def remove(self,low,high,item):
+        '''Remove the interval [low, high] with its item, which must have been added with the same ends.'''
+        node = self._findNode(low,high,False)
+        if node is None:
+            raise KeyError(item)
+        byLow = node[1]
+        byHigh = node[2]
+        i = bisect.bisect_left(byLow,(low,item))
+        j = bisect.bisect_left(byHigh,(-high,item))
+        if i==len(byLow) or byLow[i]!=(low,item) or j==len(byHigh) or byHigh[j]!=(-high,item):
+            raise KeyError(item)
+        del byLow[i]
+        del byHigh[j]
+        self.count -= 1
+        self.edits += 1
+
+
+    def query(self,value):
+        '''Get the items of all intervals containing the value, ends included.'''
+        found = []
+        node = self.root
+        while node:
+            center,byLow,byHigh,left,right = node
+            if value<center:
+                for low,item in byLow:
+                    if low>value:
+                        break
+                    found.append(item)
+                node = left
+            elif value>center:
+                for negativeHigh,item in byHigh:
+                    if -negativeHigh<value:
+                        break
+                    found.append(item)
+                node = right
+            else:    # every interval in this node contains the center
+                found.extend([item for low,item in byLow])
+                break
+
+        return found
+
+
+class EdgeIndex(object):
+    '''Index the edges of a polygon by their y-ranges, to find the edges a horizontal line through a point may meet.
+    An edge is kept as the tuple (x1, y1, x2, y2) of its coordinates, so that edges can be inserted and removed as
+    the polygon is edited, without renumbering the others.'''
+
+    def __init__(self,edges):    # receive a list of segment objects
+        self.yTree = None
+
+        coordinates = [(eachEdge.startPoint.x,eachEdge.startPoint.y,eachEdge.endPoint.x,eachEdge.endPoint.y)
+                       for eachEdge in edges]
+        self.yTree = IntervalTree([min(c[1],c[3]) for c in coordinates],[max(c[1],c[3]) for c in coordinates],
+                                  coordinates)
+
+
+    def insert(self,coordinates):
+        '''Add an edge given as the tuple (x1, y1, x2, y2).'''
+        self.yTree.insert(min(coordinates[1],coordinates[3]),max(coordinates[1],coordinates[3]),coordinates)
+
+
+    def remove(self,coordinates):
+        self.yTree.remove(min(coordinates[1],coordinates[3]),max(coordinates[1],coordinates[3]),coordinates)
+
+
+    def isUneven(self):
+        '''To determine whether more edges were inserted or removed than were indexed at first, after which the
+        index should be built again.'''
+        return self.yTree.edits>max(self.yTree.count,edgeIndexMinEdges)
+
+
+    def query(self,y):
+        '''Get the coordinates (x1, y1, x2, y2) of the edges whose y-range contains y.'''
+        return self.yTree.query(y)
+
+
+def getEdgeIndex(polygon):
+    '''Get the edge index of a polygon. It is built on the first call and kept until the polygon is invalidated,
+    and updated as the polygon is edited.'''
+    if not isinstance(polygon,Polygon2D):
+        raise GeometryTypeError("A non-polygon object encountered in function 'getEdgeIndex()'.")
+
+    index = polygon._cache.get('edgeIndex')
+    if index is None:
+        index = EdgeIndex(polygon.edgeList)
+        polygon._cache['edgeIndex'] = index
+    return index
+
+
+def getCandidateEdgeCoordinates(y,polygon):
+    '''Get the coordinates (x1, y1, x2, y2) of the edges of a polygon that a horizontal line through y may meet.
+    All edges are returned for small polygons.'''
+    if len(polygon.edgeList)<edgeIndexMinEdges:
+        return edgeCoordinates(polygon)
+    return getEdgeIndex(polygon).query(y)
+
+
+outsideCell = 0
+insideCell = 1
+boundaryCell = 2
+
+
+class PolygonGrid(object):
+    '''A uniform grid over the bounding box of a polygon, each cell of which is marked as wholly in the polygon,
+    wholly out of it, or crossed by its edges. A point in a marked cell is told in O(1). A point in a crossed cell is
+    tested against the edges crossing the cells from it to the next marked cell on its right, where the horizontal
+    line cast from it can stop, as the side of that cell is known.
+    resolution is the count of cells along the longer side of the bounding box, or a tuple (columns, rows). It is
+    lowered until the grid is estimated to fit in memoryBudget bytes.'''
+
+    def __init__(self,polygon,resolution=None,memoryBudget=None):
+        if not isinstance(polygon,Polygon2D):
+            raise GeometryTypeError("A non-polygon object encountered when trying to build a polygon grid.")
+        if memoryBudget is None:
+            memoryBudget = gridMemoryBudget
+        self.box = polygon.getBoundingBox()
+        minX,minY,maxX,maxY = self.box
+        edges = edgeCoordinates(polygon)
+        columns,rows = self._getShape(resolution,len(edges),memoryBudget)
+
+        while True:
+            self._setShape(columns,rows)
+            if columns*rows+gridEntryBytes*self._countCrossings(edges)<=memoryBudget or columns*rows==1:
+                break
+            columns = max(1,int(columns*0.7))
+            rows = max(1,int(rows*0.7))
+
+        self.cellEdges = {}    # edges crossing each crossed cell, as tuples of coordinates
+        for eachEdge in edges:
+            for eachCell in self._crossedCells(eachEdge):
+                self.cellEdges.setdefault(eachCell,[]).append(eachEdge)
+
+        # a run of cells along a row crossed by no edge is wholly on one side, which is found at its first cell
+        self.states = bytearray(self.columns*self.rows)
+        for row in xrange(self.rows):
+            y = minY+(row+0.5)*self.cellHeight
+            candidates = None
+            state = None
+            for column in xrange(self.columns):
+                cell = row*self.columns+column
+                if cell in self.cellEdges:
+                    self.states[cell] = boundaryCell
+                    state = None
+                    continue
+                if state is None:
+                    if candidates is None:
+                        candidates = getCandidateEdgeCoordinates(y,polygon)
+                    inside = pointInPolygon(minX+(column+0.5)*self.cellWidth,y,candidates)
+                    state = insideCell if inside else outsideCell
+                self.states[cell] = state
+
+
+    def _getShape(self,resolution,edgeCount,memoryBudget):
+        minX,minY,maxX,maxY = self.box
+        width = maxX-minX
+        height = maxY-minY
+        if isinstance(resolution,tuple):
+            if len(resolution)!=2:
+                raise GeometryTypeError("The resolution of a polygon grid must be a count of cells or a tuple (columns, rows).")
+            columns,rows = resolution
+        else:
+            if resolution is None:
+                shorter = min(width,height)
+                ratio = max(width,height)/shorter if shorter>0 else 1.0    # a flat polygon gets one row or column
+                resolution = max(4,int(min(math.sqrt(gridCellsPerEdge*edgeCount*ratio),memoryBudget)))
+            elif not isinstance(resolution,int):
+                raise GeometryTypeError("The resolution of a polygon grid must be a count of cells or a tuple (columns, rows).")
+            longer = max(width,height)
+            # at least one cell along a side of no length, for a flat polygon
+            columns = resolution if width==longer else max(1,int(math.ceil(resolution*width/longer)))
+            rows = resolution if height==longer else max(1,int(math.ceil(resolution*height/longer)))
+        if not (isinstance(columns,int) and isinstance(rows,int)) or columns<1 or rows<1:
+            raise GeometryTypeError("The resolution of a polygon grid must be a positive count of cells.")
+        return columns,rows
+
+
+    def _setShape(self,columns,rows):
+        minX,minY,maxX,maxY = self.box
+        self.columns = columns
+        self.rows = rows
+        self.cellWidth = (maxX-minX)/columns or 1.0
+        self.cellHeight = (maxY-minY)/rows or 1.0
+        # cells are widened by this fraction on each side when edges are put in them, so that a point rounded into
+        # a neighbouring cell still finds the edges it is near
+        scale = max(abs(minX),abs(minY),abs(maxX),abs(maxY))
+        self.padding = 1e-6+1e-15*scale/min(self.cellWidth,self.cellHeight)
+
+
+    def _countCrossings(self,edges):
+        '''Estimate the count of cells crossed by the edges, adding up their lengths in cells.'''
+        count = 0
+        for x1,y1,x2,y2 in edges:
+            count += int(abs(x2-x1)/self.cellWidth+abs(y2-y1)/self.cellHeight)+2
+        return count
+
+
+    def _crossedCells(self,edge):
+        '''Get the cells that an edge crosses, each widened by the padding.'''
+        minX,minY = self.box[:2]
+        padding = self.padding
+        u1 = (edge[0]-minX)/self.cellWidth    # in cells from the corner of the box
+        v1 = (edge[1]-minY)/self.cellHeight
+        u2 = (edge[2]-minX)/self.cellWidth
+        v2 = (edge[3]-minY)/self.cellHeight
+        lowU = min(u1,u2)
+        highU = max(u1,u2)
+        for column in xrange(max(0,int(math.floor(lowU-padding))),min(self.columns-1,int(math.floor(highU+padding)))+1):
+            if u1==u2:
+                lowV = min(v1,v2)
+                highV = max(v1,v2)
+            else:
+                # the part of the edge over this column
+                va = v1+(max(column-padding,lowU)-u1)*(v2-v1)/(u2-u1)
+                vb = v1+(min(column+1+padding,highU)-u1)*(v2-v1)/(u2-u1)
+                lowV = min(va,vb)
+                highV = max(va,vb)
+            for row in xrange(max(0,int(math.floor(lowV-padding))),min(self.rows-1,int(math.floor(highV+padding)))+1):
+                yield row*self.columns+column
+
+
+    def contains(self,x,y):
+        '''To determine whether a point is in the polygon, including its edge, the same as 'isInPolygon()'.'''
+        minX,minY,maxX,maxY = self.box
+        if not (minX<=x<=maxX and minY<=y<=maxY):
+            return False
+        columns = self.columns
+        column = min(int((x-minX)/self.cellWidth),columns-1)
+        row = min(int((y-minY)/self.cellHeight),self.rows-1)
+        cell = row*columns+column
+        states = self.states
+        state = states[cell]
+        if state!=boundaryCell:
+            return state==insideCell
+
+        edges = self.cellEdges[cell]
+        rowEnd = (row+1)*columns
+        cell += 1
+        if cell<rowEnd and states[cell]==boundaryCell:    # edges of a run of crossed cells, each of them once
+            edges = set(edges)
+            while cell<rowEnd and states[cell]==boundaryCell:
+                edges.update(self.cellEdges[cell])
+                cell += 1
+        if cell==rowEnd:
+            return pointInPolygon(x,y,edges)    # the line goes out of the box
+        return pointInPolygon(x,y,edges,minX+(cell-row*columns+0.5)*self.cellWidth,states[cell]==insideCell)
+
+
+    def __str__(self):
+        return "PolygonGrid <%d x %d cells, %d crossed>" %(self.columns,self.rows,len(self.cellEdges))
+
+
+def compilePolygonGrid(polygon,resolution=None,memoryBudget=None):
+    '''Build a grid of a polygon for fast repeated queries, see 'PolygonGrid'. It is kept in the polygon and used
+    by 'isInPolygon()' from then on, until the polygon is edited or invalidated.'''
+    grid = PolygonGrid(polygon,resolution,memoryBudget)
+    polygon._cache['grid'] = grid
+    return grid
+
+
+
+class RTree(object):
+    '''A static r-tree over bounding boxes, packed by sort-tile-recursive (STR). A query returns the indexes of the
+    boxes containing a point.'''
+
+    def __init__(self,boxes):    # receive a list of tuples (minX, minY, maxX, maxY)
+        self.count = 0
+        self.root = None
+
+        self.count = len(boxes)
+        nodes = [[box[0],box[1],box[2],box[3],i] for i,box in enumerate(boxes)]    # leaf entries refer to a box by its index
+        isLeafLevel = True
+        while nodes and (len(nodes)>1 or isLeafLevel):
+            nodes = self._pack(nodes,isLeafLevel)
+            isLeafLevel = False
+        self.root = nodes[0] if nodes else None
+
+
+    def _pack(self,nodes,isLeafLevel):
+        '''Pack one level of nodes into parent nodes: sort by center x into vertical slices, then by center y in each slice.'''
+        capacity = rTreeNodeCapacity
+        nodeCount = int(math.ceil(len(nodes)/float(capacity)))
+        sliceCount = int(math.ceil(math.sqrt(nodeCount)))
+        sliceSize = sliceCount*capacity
+
+        nodes = sorted(nodes,key=lambda node:node[0]+node[2])
+        parents = []
+        for sliceStart in xrange(0,len(nodes),sliceSize):
+            thisSlice = sorted(nodes[sliceStart:sliceStart+sliceSize],key=lambda node:node[1]+node[3])
+            for start in xrange(0,len(thisSlice),capacity):
+                children = thisSlice[start:start+capacity]
+                parents.append([min([child[0] for child in children]),min([child[1] for child in children]),
+                                max([child[2] for child in children]),max([child[3] for child in children]),
+                                children,isLeafLevel])
+        return parents
+
+
+    def query(self,x,y):
+        '''Get the indexes of all boxes containing the point (x, y), edges included.'''
+        found = []
+        if self.root is None:
+            return found
+
+        stack = [self.root]
+        while stack:
+            minX,minY,maxX,maxY,children,isLeaf = stack.pop()
+            if not (minX<=x<=maxX and minY<=y<=maxY):
+                continue
+            if isLeaf:
+                for child in children:
+                    if child[0]<=x<=child[2] and child[1]<=y<=child[3]:
+                        found.append(child[4])
+            else:
+                stack.extend(children)
+
+        return found
+
+
+class PolygonIndex(object):
+    '''Index a collection of polygons by their bounding boxes in an r-tree, to find the polygons containing a point.
+    Only the few polygons whose bounding box contains the point are tested by 'isInPolygon()'.'''
+
+    def __init__(self,polygons):    # receive a sequence of polygon objects
+        self.polygons = []
+        self.tree = None
+
+        for eachPolygon in polygons:
+            if not isinstance(eachPolygon,Polygon2D):
+                raise GeometryTypeError("A non-polygon object encountered when trying to construct a polygon index.")
+            self.polygons.append(eachPolygon)
+        self.tree = RTree([eachPolygon.getBoundingBox() for eachPolygon in self.polygons])
+
+
+    def query(self,p):
+        '''Get the indexes of the polygons containing the point, edges included, in ascending order.'''
+        from Geo2DFunctions import isInPolygon    # imported here as Geo2DFunctions imports this module
+
+        if not isinstance(p,Point2D):
+            raise GeometryTypeError("A non-point object encountered in function 'PolygonIndex.query()'.")
+        candidates = self.tree.query(p.x,p.y)
+        candidates.sort()
+        return [i for i in candidates if isInPolygon(p,self.polygons[i])]
+
+
+    def queryBatch(self,points):
+        '''Get the indexes of the polygons containing each of the points, receiving point objects or a point array.
+        Return a list of lists in the same order as the points.'''
+        return [self.query(eachPoint) for eachPoint in points]
+
+
+
+class KDTree(object):
+    '''A static kd-tree over a collection of points, for nearest-neighbour and within-radius queries.
+    Distances are the same as 'getDistance()' between two points.'''
+
+    def __init__(self,points):    # receive a sequence of point objects, or a point array
+        self.count = 0
+        self.xs = []    # coordinates in the order of the tree, so that each leaf is a contiguous range
+        self.ys = []
+        self.indexes = []    # index of each of them in the given points
+        self.root = None
+
+        if isinstance(points,PointArray):
+            xs = [float(x) for x in points.xs]
+            ys = [float(y) for y in points.ys]
+        else:
+            xs = []
+            ys = []
+            for eachPoint in points:
+                if not isinstance(eachPoint,Point2D):
+                    raise GeometryTypeError("A non-point object encountered when trying to construct a kd-tree.")
+                xs.append(eachPoint.x)
+                ys.append(eachPoint.y)
+
+        self.count = len(xs)
+        order = range(self.count)
+        self.root = self._build(order,0,self.count,0,(xs,ys))
+        self.xs = [xs[i] for i in order]
+        self.ys = [ys[i] for i in order]
+        self.indexes = order
+
+
+    def _build(self,order,start,end,axis,coordinates):
+        '''Split order[start:end] at the median along the axis, 0 for x and 1 for y, sorting it in place.'''
+        if end-start<=kdTreeLeafSize:
+            return [None,start,end]    # a leaf
+
+        values = coordinates[axis]
+        order[start:end] = sorted(order[start:end],key=values.__getitem__)
+        middle = (start+end)>>1
+        split = values[order[middle]]    # points in the left part are not greater than it, in the right part not less
+        return [axis,split,self._build(order,start,middle,1-axis,coordinates),self._build(order,middle,end,1-axis,coordinates)]
+
+
+    def nearest(self,p,k=1):
+        '''Get the k points nearest to the point, as a list of tuples (distance, index) from the nearest one.
+        Points at the same distance are ordered by index.'''
+        if not isinstance(p,Point2D):
+            raise GeometryTypeError("A non-point object encountered in function 'KDTree.nearest()'.")
+        if k<1:
+            return []
+
+        px = p.x
+        py = p.y
+        xs = self.xs
+        ys = self.ys
+        indexes = self.indexes
+        best = []    # heap of (-squared distance, -index), the worst of the k found so far on top
+        stack = [(self.root,0.0)] if self.root else []
+        while stack:
+            node,planeDistance = stack.pop()
+            if len(best)==k and planeDistance>-best[0][0]:
+                continue    # this part of the tree is farther than all the k points found
+
+            axis = node[0]
+            if axis is None:
+                for i in xrange(node[1],node[2]):
+                    dx = px-xs[i]
+                    dy = py-ys[i]
+                    candidate = (-(dx*dx+dy*dy),-indexes[i])
+                    if len(best)<k:
+                        heapq.heappush(best,candidate)
+                    elif candidate>best[0]:
+                        heapq.heapreplace(best,candidate)
+                continue
+
+            diff = (px if axis==0 else py)-node[1]
+            if diff<0:
+                stack.append((node[3],diff*diff))    # the far side is visited after the near side
+                stack.append((node[2],planeDistance))
+            else:
+                stack.append((node[2],diff*diff))
+                stack.append((node[3],planeDistance))
+
+        best.sort(reverse=True)
+        return [(math.sqrt(-distance),-index) for distance,index in best]
+
+
+    def within(self,p,r):
+        '''Get the indexes of the points whose distance to the point is not greater than r, in ascending order.'''
+        if not isinstance(p,Point2D):
+            raise GeometryTypeError("A non-point object encountered in function 'KDTree.within()'.")
+
+        px = p.x
+        py = p.y
+        xs = self.xs
+        ys = self.ys
+        indexes = self.indexes
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            axis = node[0]
+            if axis is None:
+                for i in xrange(node[1],node[2]):
+                    dx = px-xs[i]
+                    dy = py-ys[i]
+                    if math.sqrt(dx*dx+dy*dy)<=r:
+                        found.append(indexes[i])
+                continue
+
+            diff = (px if axis==0 else py)-node[1]
+            if diff<=r:
+                stack.append(node[2])
+            if diff>=-r:
+                stack.append(node[3])
+
+        found.sort()
+        return found
+
+
+    def nearestBatch(self,points,k=1):
+        '''Same as 'nearest()' for each of the points, receiving point objects or a point array.'''
+        return [self.nearest(eachPoint,k) for eachPoint in points]
+
+
+    def withinBatch(self,points,r):
+        '''Same as 'within()' for each of the points, receiving point objects or a point array.'''
+        return [self.within(eachPoint,r) for eachPoint in points]
+
+
+
+
+if __name__=='__main__':
+    tree = IntervalTree([0,2,5,1],[3,4,6,1])
+    print tree.query(1)
+    print tree.query(3.5)
+    print tree.query(7)
+
+    polygon = Polygon2D((0,0),(0,1),(-1,1),(-1,-1),(3,-1),(3,0),(2,0),(2,1),(1,1),(1,0))
+    print getEdgeIndex(polygon).query(0.5)
+    grid = compilePolygonGrid(polygon,8)
+    print grid,grid.contains(0.5,0.5),grid.contains(1.5,0.5),grid.contains(2.5,0.5)
+    flat = Polygon2D((0,0),(1,0),(2,0))    # a bounding box of no height
+    grid = compilePolygonGrid(flat)
+    print grid,grid.contains(1.5,0),grid.contains(1.5,0.1),grid.contains(2.5,0)
+
+    zones = PolygonIndex([polygon,Polygon2D((0,0),(4,0),(4,4),(0,4)),Polygon2D((5,5),(6,5),(6,6))])
+    print zones.query(Point2D(0.5,0.5))
+    print zones.queryBatch([Point2D(2.5,0.5),Point2D(5.5,5.2),Point2D(9,9)])
+
+    tree = KDTree(polygon.vertexList)
+    print tree.nearest(Point2D(2.4,0.9),2)
+    print tree.within(Point2D(0,0),1)
@@ -0,0 +1,132 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# opt-in instrumentation: count calls, time spent and exceptions raised in the geometry functions and constructors.
+# while it is disabled nothing is wrapped, so it costs nothing at all
+
+import functools
+import sys
+from timeit import default_timer
+
+import Geo2DElements
+import Geo2DFunctions
+import Geo2DVector
+
+
+# functions and classes (whose constructors are) instrumented, by module
+instrumentedFunctions = [(Geo2DFunctions,['isInSegment','isParallel','isVertical','getDistance','getIntersect',
+                                          'getIntersect_horizontal','getIntersect_vertical','isInPolygon',
+                                          'findAllIntersections']),
+                         (Geo2DVector,['getInnerProduct'])]
+instrumentedClasses = [(Geo2DElements,['Point2D','Segment2D','PointArray','SegmentArray','Polygon2D']),
+                       (Geo2DVector,['Vector2D'])]
+
+
+class _Counter(object):
+    __slots__ = ('calls','totalTime','exceptions')
+
+    def __init__(self):
+        self.calls = 0
+        self.totalTime = 0.0
+        self.exceptions = {}    # count of each type of exception raised, by the name of the type
+
+
+_counters = {}    # by the qualified name of the function, e.g. 'Geo2DFunctions.isInPolygon'
+_patches = []    # tuples (restore, qualified name) of what is wrapped while enabled
+
+
+def _wrap(function,name):
+    counter = _counters.setdefault(name,_Counter())
+
+    @functools.wraps(function)
+    def instrumented(*args,**kwargs):
+        start = default_timer()
+        try:
+            return function(*args,**kwargs)
+        except Exception as e:
+            typeName = type(e).__name__
+            counter.exceptions[typeName] = counter.exceptions.get(typeName,0)+1
+            raise
+        finally:
+            counter.calls += 1
+            counter.totalTime += default_timer()-start
+
+    return instrumented
+
+
+def _replaceEverywhere(old,new,name):
+    '''Replace a module-level function in every loaded module that refers to it by the name, such as those that did
+    'from Geo2DFunctions import *', so that calls from anywhere are counted.'''
+    for module in sys.modules.values():
+        namespace = getattr(module,'__dict__',None)
+        if namespace is not None and namespace.get(name) is old:
+            namespace[name] = new
+
+
+def isInstrumentationEnabled():
+    return bool(_patches)
+
+
+def enableInstrumentation():
+    '''Wrap the instrumented functions and constructors to count calls, time and exceptions.'''
+    if _patches:
+        return
+
+    for module,names in instrumentedFunctions:
+        for name in names:
+            original = getattr(module,name)
+            wrapped = _wrap(original,module.__name__+'.'+name)
+            _replaceEverywhere(original,wrapped,name)
+            _patches.append((lambda original=original,wrapped=wrapped,name=name:_replaceEverywhere(wrapped,original,name),name))
+
+    for module,names in instrumentedClasses:
+        for name in names:
+            cls = getattr(module,name)
+            original = cls.__dict__['__init__']
+            cls.__init__ = _wrap(original,module.__name__+'.'+name)
+            _patches.append((lambda cls=cls,original=original:setattr(cls,'__init__',original),name))
+
+
+def disableInstrumentation():
+    '''Restore the original functions and constructors. The counts are kept until reset.'''
+    while _patches:
+        restore,name = _patches.pop()
+        restore()
+
+
+def getSnapshot():
+    '''Get the counts as a dict by qualified name, each a dict of calls, total time and mean time in seconds, and
+    the exceptions raised by type. Functions never called are left out.'''
+    snapshot = {}
+    for name,counter in _counters.items():
+        if not counter.calls:
+            continue
+        snapshot[name] = {'calls':counter.calls,'totalTime':counter.totalTime,
+                          'meanTime':counter.totalTime/counter.calls,'exceptions':dict(counter.exceptions)}
+    return snapshot
+
+
+def resetCounters():
+    '''Set every count back to zero.'''
+    for counter in _counters.values():
+        counter.calls = 0
+        counter.totalTime = 0.0
+        counter.exceptions.clear()
+
+
+
+
+if __name__=='__main__':
+    from Geo2DFunctions import *
+
+    enableInstrumentation()
+    polygon = Polygon2D((0,0),(0,1),(-1,1),(-1,-1),(3,-1),(3,0),(2,0),(2,1),(1,1),(1,0))
+    print isInPolygon(Point2D(-0.5,0),polygon)
+    try:
+        getIntersect(Segment2D((1,1.5),(2,2.5)),Segment2D((1,2.5),(2,3.5)))
+    except ParallelLineException:
+        pass
+    disableInstrumentation()
+
+    for name,counts in sorted(getSnapshot().items()):
+        print name,counts['calls'],counts['exceptions']
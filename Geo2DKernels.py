@@ -0,0 +1,217 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# kernels of the geometry functions, working on plain floats rather than point and segment objects.
+# they are trusted: nothing is checked, and no intermediate object is made. a point is given as x, y and a segment
+# as x1, y1, x2, y2. the public functions in Geo2DFunctions check their parameters and call these.
+
+from __future__ import division
+
+import math
+
+from Geo2DExceptions import *
+from Geo2DPredicates import crossSign,dotSign,orientation,intersect,isExactMode
+
+
+def pointInSegment(px,py,x1,y1,x2,y2):
+    '''Kernel of 'isInSegment()'.'''
+    if not (min(x1,x2)<=px<=max(x1,x2) and min(y1,y2)<=py<=max(y1,y2)):
+        return False
+    if isExactMode():
+        return orientation(x1,y1,x2,y2,px,py)==0
+    return (x2-x1)*(py-y1)==(y2-y1)*(px-x1)    # the cross product is zero
+
+
+def linesParallel(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Kernel of 'isParallel()'.'''
+    if crossSign(x1,y1,x2,y2,x3,y3,x4,y4)!=0:
+        return False
+    if orientation(x1,y1,x2,y2,x3,y3)==0:
+        raise CoincidedLinesException("Two lines are coincide.")
+    return True
+
+
+def linesVertical(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Kernel of 'isVertical()'.'''
+    if crossSign(x1,y1,x2,y2,x3,y3,x4,y4)==0 and orientation(x1,y1,x2,y2,x3,y3)==0:
+        raise CoincidedLinesException("Two lines are coincide.")
+    return dotSign(x1,y1,x2,y2,x3,y3,x4,y4)==0
+
+
+def pointDistance(x1,y1,x2,y2):
+    '''Kernel of 'getDistance()' between two points.'''
+    dx = x1-x2
+    dy = y1-y2
+    return math.sqrt(dx*dx+dy*dy)
+
+
+def pointLineDistance(px,py,x1,y1,x2,y2):
+    '''Kernel of 'getDistance()' between a point and the line in which a segment exists.'''
+    if y1==y2:    # horizontal
+        return abs(py-y1)
+    elif x1==x2:    # vertical
+        return abs(px-x1)
+    dx = x2-x1
+    dy = y2-y1
+    return abs(dx*(py-y1)-dy*(px-x1))/math.hypot(dx,dy)    # the cross product is the area of a parallelogram on the segment
+
+
+def pointSegmentDistance(px,py,x1,y1,x2,y2):
+    '''Get the distance between a point and a segment itself, to its nearest end point if the foot of the
+    perpendicular from the point is out of the segment.'''
+    dx = x2-x1
+    dy = y2-y1
+    length2 = dx*dx+dy*dy
+    if length2==0:
+        return pointDistance(px,py,x1,y1)
+    t = ((px-x1)*dx+(py-y1)*dy)/length2    # where the foot of the perpendicular is along the segment
+    if t<=0:
+        return pointDistance(px,py,x1,y1)
+    elif t>=1:
+        return pointDistance(px,py,x2,y2)
+    return pointDistance(px,py,x1+t*dx,y1+t*dy)
+
+
+def parallelLineDistance(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Kernel of 'getDistance()' between the lines in which two parallel segments exist.'''
+    if crossSign(x1,y1,x2,y2,x3,y3,x4,y4)!=0:
+        raise CrossingLinesNoDistanceError("Two given lines are not parallel, and thus they have no distance.")
+    return pointLineDistance(x3,y3,x1,y1,x2,y2)
+
+
+def lineIntersect(x1,y1,x2,y2,x3,y3,x4,y4,onLine=0):
+    '''Kernel of 'getIntersect()'. Return the intersect as a tuple (x, y).'''
+    found = intersect(x1,y1,x2,y2,x3,y3,x4,y4)
+    if found is None:
+        if orientation(x1,y1,x2,y2,x3,y3)==0:
+            raise CoincidedLinesException("Two lines are coincide.")
+        raise ParallelLineException("Cannot get intersection of the two segments as they are parallel.")
+
+    x,y,t,u = found
+    if onLine or (0<=t<=1 and 0<=u<=1):
+        return x,y
+    raise NoIntersectError("Given segments have an intersect not in either of the segments.")
+
+
+def horizontalIntersectX(py,x1,y1,x2,y2):
+    '''Kernel of 'getIntersect_horizontal()'. Return the x-coordinate of the intersect.'''
+    if py==y1 or x1==x2:
+        return 1.0*x1    # the intersect is the start point of the segment, or the segment is vertical
+    if y1==y2:
+        raise HorizontalLineException("This line is horizontal. No intersect can be found.")
+    return x1+(py-y1)*(x2-x1)/(y2-y1)
+
+
+def verticalIntersectY(px,x1,y1,x2,y2):
+    '''Kernel of 'getIntersect_vertical()'. Return the y-coordinate of the intersect.'''
+    if px==x1 or y1==y2:
+        return 1.0*y1    # the intersect is the start point of the segment, or the segment is horizontal
+    if x1==x2:
+        raise VerticalLineException("This line is vertical. No intersect can be found.")
+    return y1+(px-x1)*(y2-y1)/(x2-x1)
+
+
+def edgeCoordinates(polygon):
+    '''Get the edges of a polygon as a list of tuples (x1, y1, x2, y2), in the order of its edges. Cached in the
+    polygon, and updated as it is edited.'''
+    coordinates = polygon._cache.get('edgeCoordinates')
+    if coordinates is None:
+        coordinates = [(eachEdge.startPoint.x,eachEdge.startPoint.y,eachEdge.endPoint.x,eachEdge.endPoint.y)
+                       for eachEdge in polygon.edgeList]
+        polygon._cache['edgeCoordinates'] = coordinates
+    return coordinates
+
+
+def edgeColumns(polygon):
+    '''Get the start points and the end points of the edges of a polygon as four lists of floats.'''
+    columns = tuple(list(eachColumn) for eachColumn in zip(*edgeCoordinates(polygon)))
+    return columns if columns else ([],[],[],[])
+
+
+def pointInPolygon(px,py,edges,stopX=None,beyond=False):
+    '''Kernel of 'isInPolygon()' for any polygon, on the edges given as tuples (x1, y1, x2, y2), those a horizontal
+    line through the point may meet at least.
+    A horizontal line is cast to the right of the point, and the point is in the polygon if the line crosses its
+    edges an odd count of times. An edge is crossed if its end points are on the two sides of the line, a vertex on
+    the line being taken as above it, so that a line through a vertex is counted right. On which side of the point
+    the line crosses an edge is told by the sign of a cross product, without computing the intersect.
+    If stopX is given, the line stops there, at a point known to be off the edges and in the polygon if beyond is
+    true: only the edges the line may meet before it are needed then.'''
+    exact = isExactMode()
+
+    inside = False
+    for x1,y1,x2,y2 in edges:
+        if (y1>py)!=(y2>py):    # the edge crosses the line
+            # positive if the point is on the left of the edge, taken as in 'pointInSegment()' so that a point
+            # 'isInSegment()' finds on the edge is found on it here too
+            if exact:
+                side = orientation(x1,y1,x2,y2,px,py)
+            else:
+                side = (x2-x1)*(py-y1)-(y2-y1)*(px-x1)
+            if side==0 and (x1<=px<=x2 or x2<=px<=x1):
+                return True    # this point is on the edge of the polygon
+            if (side>0)==(y2>y1):    # crossed on the right of the point
+                if stopX is not None:
+                    if exact:
+                        side = orientation(stopX,py,x1,y1,x2,y2)
+                    else:
+                        side = (x1-stopX)*(y2-py)-(y1-py)*(x2-stopX)
+                    if (side>0)==(y2>y1):
+                        continue    # and on the right of the stop, where it is counted in beyond already
+                inside = not inside
+        elif (py==y1 or py==y2) and pointInSegment(px,py,x1,y1,x2,y2):
+            return True    # this point is on an edge the line only meets at an end point, or on a horizontal edge
+
+    return inside!=beyond
+
+
+def pointInConvexFan(px,py,fan):
+    '''Kernel of 'isInPolygon()' for a convex polygon, including its edge, in O(log n). The polygon is given as a fan
+    (xs, ys, corners, sign) of its vertexes, the indexes of its corners and the way it goes, and cut into triangles
+    fanning out from the first corner. The one whose wedge holds the point is found by binary search.
+    Where the signs find the point out of the polygon, the edges there are tested by 'pointInSegment()', so that a
+    point found on an edge is found in the polygon too, whatever the rounding.'''
+    xs,ys,corners,sign = fan
+    last = len(corners)-1
+    x0 = xs[0]
+    y0 = ys[0]
+    if (sign*orientation(x0,y0,xs[corners[1]],ys[corners[1]],px,py)<0 or
+        sign*orientation(x0,y0,xs[corners[last]],ys[corners[last]],px,py)>0):
+        # out of the wedge between the first edge and the final edge
+        return (_pointInEdges(px,py,xs,ys,0,corners[min(2,last)]) or
+                _pointInEdges(px,py,xs,ys,corners[last-1],len(xs)))
+
+    low = 1    # the point is on the left of (or on) the ray to this corner, going counterclockwise
+    high = last    # and on the right of (or on) the ray to this one
+    while high-low>1:
+        middle = (low+high)>>1
+        if sign*orientation(x0,y0,xs[corners[middle]],ys[corners[middle]],px,py)>=0:
+            low = middle
+        else:
+            high = middle
+
+    # on the inner side of (or on) the edge from corner low to corner high
+    if sign*orientation(xs[corners[low]],ys[corners[low]],xs[corners[high]],ys[corners[high]],px,py)>=0:
+        return True
+    return _pointInEdges(px,py,xs,ys,corners[low-1],corners[high+1] if high<last else len(xs))
+
+
+def _pointInEdges(px,py,xs,ys,start,end):
+    '''To determine whether a point is on one of the edges from vertex start to vertex end of a polygon.'''
+    count = len(xs)
+    for i in xrange(start,end):
+        j = (i+1)%count
+        if pointInSegment(px,py,xs[i],ys[i],xs[j],ys[j]):
+            return True
+    return False
+
+
+def segmentIntersect(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Get the intersect of two segments as a tuple, or None if they are parallel or do not meet. End points included.'''
+    found = intersect(x1,y1,x2,y2,x3,y3,x4,y4)
+    if found is None:
+        return None
+    x,y,t,u = found
+    if not (0<=t<=1 and 0<=u<=1):
+        return None
+    return x,y
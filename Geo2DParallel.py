@@ -0,0 +1,248 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# parallel versions of the batch functions, splitting the points across a pool of worker processes.
+# coordinates, polygon edges and results are held in shared memory, so no geometry object is ever pickled;
+# each worker only receives the bounds of its range of points and writes its results in place.
+
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+import Geo2DBatch
+from Geo2DBatch import _splitCoordinates,_isInPolygonColumns,_distanceTarget,_distanceColumns
+from Geo2DKernels import edgeColumns
+from Geo2DPredicates import isExactMode,setExactMode
+
+
+parallelMinPoints = 10000    # fewer points are worked on in this process, as starting the pool costs more
+chunksPerProcess = 4    # ranges of points given to each worker process, to balance uneven work
+
+
+_shared = None    # in a worker process, what was shared by '_initWorker()'
+
+
+def _initWorker(shared):
+    global _shared
+    _shared = shared
+
+
+def _sharedFloats(values):
+    '''Copy a sequence of floats into shared memory.'''
+    if Geo2DBatch.numpy is None:
+        return RawArray('d',[float(value) for value in values])
+    shared = RawArray('d',len(values))
+    Geo2DBatch.numpy.frombuffer(shared,dtype=Geo2DBatch.numpy.float64)[:] = values
+    return shared
+
+
+def _columnViews(sharedColumns,count):
+    '''Get the columns of floats packed in one shared array, as numpy arrays over the shared memory if numpy is
+    installed, or else as lists.'''
+    numpy = Geo2DBatch.numpy
+    if numpy is None:
+        return [sharedColumns[i*count:(i+1)*count] for i in xrange(len(sharedColumns)//count if count else 0)]
+    return list(numpy.frombuffer(sharedColumns,dtype=numpy.float64).reshape(-1,count))
+
+
+def _pointRange(start,stop):
+    xs = _shared['xs']
+    ys = _shared['ys']
+    if Geo2DBatch.numpy is None:
+        return xs[start:stop],ys[start:stop]
+    numpy = Geo2DBatch.numpy
+    return (numpy.frombuffer(xs,dtype=numpy.float64)[start:stop],
+            numpy.frombuffer(ys,dtype=numpy.float64)[start:stop])
+
+
+def _classifyRange(bounds):
+    '''Work of a worker process for 'ParallelClassifier': classify the points from start to stop, in the mode of the
+    process that gave the work.'''
+    start,stop,exact = bounds
+    setExactMode(exact)
+    xs,ys = _pointRange(start,stop)
+    edges = _columnViews(_shared['edges'],_shared['edgeCount'])
+
+    mask = _isInPolygonColumns(xs,ys,tuple(edges),_shared['box'])
+    result = _shared['result']
+    if Geo2DBatch.numpy is None:
+        result[start:stop] = [int(value) for value in mask]
+    else:
+        Geo2DBatch.numpy.frombuffer(result,dtype=Geo2DBatch.numpy.int8)[start:stop] = mask
+
+
+def _distanceRange(bounds):
+    '''Work of a worker process for 'getDistanceParallel()': the distances of the points from start to stop.'''
+    start,stop = bounds
+    xs,ys = _pointRange(start,stop)
+
+    distances = _distanceColumns(xs,ys,_shared['target'])
+    result = _shared['result']
+    if Geo2DBatch.numpy is None:
+        result[start:stop] = distances
+    else:
+        Geo2DBatch.numpy.frombuffer(result,dtype=Geo2DBatch.numpy.float64)[start:stop] = distances
+
+
+def _ranges(count,processes,chunkSize):
+    if not chunkSize:
+        chunkSize = max(1,-(-count//(processes*chunksPerProcess)))
+    return [(start,min(start+chunkSize,count)) for start in xrange(0,count,chunkSize)]
+
+
+def _startPool(shared,processes):
+    return multiprocessing.Pool(processes,initializer=_initWorker,initargs=(shared,))
+
+
+def _runPool(work,shared,count,processes,chunkSize):
+    '''Run the work over every range of points in a new pool of worker processes, and wait for all of them.'''
+    pool = _startPool(shared,processes)
+    try:
+        pool.map(work,_ranges(count,processes,chunkSize))
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def _processCount(processes):
+    if processes is None:
+        return multiprocessing.cpu_count()
+    if (not isinstance(processes,int)) or processes<1:
+        raise GeometryTypeError("The count of processes must be a positive integer.")
+    return processes
+
+
+class ParallelClassifier(object):
+    '''Classify points against a polygon across a pool of worker processes (the count of CPUs by default), in
+    ranges of chunkSize points, call after call. The edges of the polygon are shared once, and the pool is started
+    with buffers for the points at the first call with enough of them, so that each later call only copies its
+    points in; a call with more points than the buffers hold is classified in parts. The polygon is not to be
+    edited while the pool is open. Close it when done.'''
+
+    def __init__(self,polygon,processes=None,chunkSize=None):
+        if not isinstance(polygon,Polygon2D):
+            raise GeometryTypeError("A non-polygon object encountered when trying to build a parallel classifier.")
+        self.polygon = polygon
+        self.processes = _processCount(processes)
+        self.chunkSize = chunkSize
+        self.capacity = 0    # points the shared buffers hold, none before the pool is started
+        self.shared = None
+        self.pool = None
+
+
+    def _start(self,capacity):
+        edges = edgeColumns(self.polygon)
+        packedEdges = []
+        for eachColumn in edges:
+            packedEdges.extend(eachColumn)
+        self.shared = {'xs':RawArray('d',capacity),'ys':RawArray('d',capacity),'edges':_sharedFloats(packedEdges),
+                       'edgeCount':len(edges[0]),'box':self.polygon.getBoundingBox(),'result':RawArray('b',capacity)}
+        self.capacity = capacity
+        self.pool = _startPool(self.shared,self.processes)
+
+
+    def _classifyPart(self,xs,ys):
+        shared = self.shared
+        count = len(xs)
+        numpy = Geo2DBatch.numpy
+        if numpy is None:
+            shared['xs'][:count] = [float(value) for value in xs]
+            shared['ys'][:count] = [float(value) for value in ys]
+        else:
+            numpy.frombuffer(shared['xs'],dtype=numpy.float64)[:count] = xs
+            numpy.frombuffer(shared['ys'],dtype=numpy.float64)[:count] = ys
+
+        exact = isExactMode()
+        try:
+            self.pool.map(_classifyRange,[(start,stop,exact) for start,stop in
+                                          _ranges(count,self.processes,self.chunkSize)])
+        except:
+            self.close(True)
+            raise
+
+        if numpy is None:
+            return [bool(value) for value in shared['result'][:count]]
+        return numpy.frombuffer(shared['result'],dtype=numpy.int8)[:count].astype(bool)
+
+
+    def classify(self,xs,ys=None):
+        '''Same as 'isInPolygonBatch()' for the polygon. Fewer points than 'parallelMinPoints' are worked on in this
+        process.'''
+        xs,ys = _splitCoordinates(xs,ys)
+        count = len(xs)
+        if self.processes==1 or count<parallelMinPoints:
+            return Geo2DBatch.isInPolygonBatch(xs,ys,self.polygon)
+        if self.pool is None:
+            self._start(count)
+
+        capacity = self.capacity
+        if count<=capacity:
+            return self._classifyPart(xs,ys)
+        masks = [self._classifyPart(xs[start:start+capacity],ys[start:start+capacity])
+                 for start in xrange(0,count,capacity)]
+        if Geo2DBatch.numpy is None:
+            return [value for eachMask in masks for value in eachMask]
+        return Geo2DBatch.numpy.concatenate(masks)
+
+
+    def close(self,terminate=False):
+        '''Stop the worker processes, once their work is done or at once if terminate is true.'''
+        pool = self.pool
+        if pool is None:
+            return
+        self.pool = None
+        self.shared = None
+        self.capacity = 0
+        if terminate:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+
+
+def isInPolygonParallel(xs,ys,polygon,processes=None,chunkSize=None):
+    '''Same as 'isInPolygonBatch()', with the points split across processes (the count of CPUs by default) in ranges
+    of chunkSize points. Return the results in input order, the same type as 'isInPolygonBatch()' does.
+    Each call starts a pool of its own; use a 'ParallelClassifier' for many calls against the same polygon.'''
+    if not isinstance(polygon,Polygon2D):
+        raise GeometryTypeError("A non-polygon object encountered in function 'isInPolygonParallel()'.")
+    classifier = ParallelClassifier(polygon,processes,chunkSize)
+    try:
+        return classifier.classify(xs,ys)
+    finally:
+        classifier.close()
+
+
+def getDistanceParallel(xs,ys,target,processes=None,chunkSize=None):
+    '''Same as 'getDistanceBatch()', with the points split across processes (the count of CPUs by default) in ranges
+    of chunkSize points. Return the distances in input order, the same type as 'getDistanceBatch()' does.'''
+    processes = _processCount(processes)
+    xs,ys = _splitCoordinates(xs,ys)
+    count = len(xs)
+    if processes==1 or count<parallelMinPoints:
+        return Geo2DBatch.getDistanceBatch(xs,ys,target)
+
+    shared = {'xs':_sharedFloats(xs),'ys':_sharedFloats(ys),'target':_distanceTarget(target),
+              'result':RawArray('d',count)}
+    _runPool(_distanceRange,shared,count,processes,chunkSize)
+
+    if Geo2DBatch.numpy is None:
+        return list(shared['result'])
+    return Geo2DBatch.numpy.frombuffer(shared['result'],dtype=Geo2DBatch.numpy.float64).copy()
+
+
+
+
+if __name__=='__main__':
+    import random
+
+    polygon = Polygon2D((0,0),(0,1),(-1,1),(-1,-1),(3,-1),(3,0),(2,0),(2,1),(1,1),(1,0))
+    xs = [random.uniform(-2,4) for i in xrange(100000)]
+    ys = [random.uniform(-2,2) for i in xrange(100000)]
+    mask = isInPolygonParallel(xs,ys,polygon,processes=4)
+    print sum(mask),len(mask)
+    print max(getDistanceParallel(xs,ys,Point2D(1,0),processes=4))
@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# predicates on the signs of cross products and dot products of coordinate differences, without any division,
+# slope or intercept. a segment is given as x1, y1, x2, y2.
+# in exact mode the signs are exact for any float or integer coordinates: a sign the float result cannot be sure of
+# is computed again with fractions, and intersects are rounded from their exact values.
+
+from __future__ import division
+
+from fractions import Fraction
+
+
+errorBound = 3.3306690738754716e-16    # relative error of a float cross product of differences, (3+16e)e with e=2**-53
+
+_exact = False
+
+
+def setExactMode(exact=True):
+    '''Turn the exact mode on or off for every predicate.'''
+    global _exact
+    _exact = bool(exact)
+
+
+def isExactMode():
+    return _exact
+
+
+def _sign(value):
+    return int(value>0)-int(value<0)    # numpy booleans cannot be subtracted
+
+
+def crossSign(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Get the sign of the cross product of the directions of two segments, 0 if they are parallel, 1 if the second
+    one turns counterclockwise from the first one and -1 if clockwise.'''
+    if _exact:
+        return exactCrossSign(x1,y1,x2,y2,x3,y3,x4,y4)
+    return _sign((x2-x1)*(y4-y3)-(y2-y1)*(x4-x3))
+
+
+def exactCrossSign(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''The same as 'crossSign()' in exact mode, whichever the mode is.'''
+    left = (x2-x1)*(y4-y3)
+    right = (y2-y1)*(x4-x3)
+    det = left-right
+    if abs(det)<=errorBound*(abs(left)+abs(right)):
+        F = Fraction
+        det = (F(x2)-F(x1))*(F(y4)-F(y3))-(F(y2)-F(y1))*(F(x4)-F(x3))
+    return _sign(det)
+
+
+def dotSign(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Get the sign of the dot product of the directions of two segments, 0 if they are perpendicular.'''
+    left = (x2-x1)*(x4-x3)
+    right = (y2-y1)*(y4-y3)
+    det = left+right
+    if _exact and abs(det)<=errorBound*(abs(left)+abs(right)):
+        F = Fraction
+        det = (F(x2)-F(x1))*(F(x4)-F(x3))+(F(y2)-F(y1))*(F(y4)-F(y3))
+    return _sign(det)
+
+
+def orientation(x1,y1,x2,y2,px,py):
+    '''Get 1 if the point is on the left of the line from (x1, y1) to (x2, y2), -1 if on the right, or 0 if on it.'''
+    return crossSign(x1,y1,x2,y2,x1,y1,px,py)
+
+
+def exactOrientation(x1,y1,x2,y2,px,py):
+    '''The same as 'orientation()' in exact mode, whichever the mode is. The point may also be given in fractions,
+    such as an exact intersect, which are rounded to floats for a first try.'''
+    if type(px) is not Fraction and type(py) is not Fraction:
+        if (px==x1 and py==y1) or (px==x2 and py==y2):
+            return 0    # an end point of the line, which fractions would only find again slowly
+        return exactCrossSign(x1,y1,x2,y2,x1,y1,px,py)
+    roundedX = float(px)
+    roundedY = float(py)
+    left = (x2-x1)*(roundedY-y1)
+    right = (y2-y1)*(roundedX-x1)
+    det = left-right
+    # the rounding of the point, of at most 2**-53 of each coordinate, may move the product by this much more
+    bound = errorBound*(abs(left)+abs(right))+2.3e-16*(abs(x2-x1)*abs(roundedY)+abs(y2-y1)*abs(roundedX))
+    if abs(det)<=bound:
+        F = Fraction
+        det = (F(x2)-F(x1))*(F(py)-F(y1))-(F(y2)-F(y1))*(F(px)-F(x1))
+    return _sign(det)
+
+
+def intersect(x1,y1,x2,y2,x3,y3,x4,y4):
+    '''Get the intersect of the lines in which two segments exist, as a tuple (x, y, t, u) where the intersect is at
+    t of the way along the first segment and at u of the way along the second one, or None if they are parallel.
+    The intersect is an end point exactly if t or u is 0 or 1.'''
+    if _exact:
+        F = Fraction
+        x1,y1,x2,y2,x3,y3,x4,y4 = F(x1),F(y1),F(x2),F(y2),F(x3),F(y3),F(x4),F(y4)
+    dx1 = x2-x1
+    dy1 = y2-y1
+    dx2 = x4-x3
+    dy2 = y4-y3
+    d = dx1*dy2-dy1*dx2    # the same as in 'crossSign()', zero when the two segments are parallel
+    if d==0:
+        return None
+    t = ((x3-x1)*dy2-(y3-y1)*dx2)/d    # the intersect is at (x1,y1)+t*(dx1,dy1)
+    u = ((x3-x1)*dy1-(y3-y1)*dx1)/d    # and at (x3,y3)+u*(dx2,dy2)
+
+    # end points are returned as they are, so that segments sharing an end point meet exactly there
+    if t==0:
+        x,y = x1,y1
+    elif t==1:
+        x,y = x2,y2
+    elif u==0:
+        x,y = x3,y3
+    elif u==1:
+        x,y = x4,y4
+    else:
+        x,y = x1+t*dx1,y1+t*dy1
+    return float(x),float(y),t,u
@@ -0,0 +1,144 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# a compact binary format for polygons and segment sets, in the manner of WKB. all numbers are little-endian.
+#     header      magic 'G2DB', format version (uint8), kind (uint8, 3 polygon, 5 segments), flags (uint16),
+#                 count of vertexes or segments (uint64)
+#     polygon     if flags has bit 0: bounding box minX, minY, maxX, maxY, signed area (5 float64),
+#                 convex (uint8) and 7 bytes of padding. then the vertexes <x0, y0, x1, y1, ...> (float64)
+#     segments    each segment <startX, startY, endX, endY> (float64)
+# the coordinates always start at an offset that is a multiple of 8, so a memory-mapped file can be viewed in place.
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+import Geo2DBatch
+
+
+formatMagic = b'G2DB'
+formatVersion = 1
+polygonKind = 3    # the same codes as WKB Polygon and MultiLineString
+segmentsKind = 5
+cachedFlag = 1    # the cached properties of a polygon are saved
+
+_header = struct.Struct('<4sBBHQ')
+_polygonProperties = struct.Struct('<5dB7x')
+
+
+def _coordinateBytes(values):
+    '''Pack floats as little-endian float64.'''
+    values = array('d',values)
+    if sys.byteorder!='little':
+        values.byteswap()
+    return values.tostring()
+
+
+def toBinary(geometry):
+    '''Get the binary form of a polygon, or of a segment set given as a segment array or a sequence of segments,
+    as a string of bytes.'''
+    if isinstance(geometry,Polygon2D):
+        xs,ys = geometry._getCoordinates()
+        minX,minY,maxX,maxY = geometry.getBoundingBox()
+        properties = _polygonProperties.pack(minX,minY,maxX,maxY,geometry.getSignedArea(),int(geometry.isConvex()))
+        coordinates = [0.0]*(2*len(xs))
+        coordinates[0::2] = xs
+        coordinates[1::2] = ys
+        return (_header.pack(formatMagic,formatVersion,polygonKind,cachedFlag,len(xs))+properties+
+                _coordinateBytes(coordinates))
+
+    coordinates = []
+    try:
+        for eachSegment in geometry:
+            if not isinstance(eachSegment,Segment2D):
+                raise GeometryTypeError("A non-segment object encountered when trying to save a segment set.")
+            coordinates.extend((eachSegment.startPoint.x,eachSegment.startPoint.y,
+                                eachSegment.endPoint.x,eachSegment.endPoint.y))
+    except TypeError:
+        raise GeometryTypeError("Only a polygon or a set of segments can be saved.")
+    return _header.pack(formatMagic,formatVersion,segmentsKind,0,len(coordinates)//4)+_coordinateBytes(coordinates)
+
+
+def _coordinateBlock(data,offset,count):
+    '''Get count float64 from the buffer at offset, as a numpy view without copying if numpy is installed, or else
+    as a copied float array.'''
+    if offset+8*count>len(data):
+        raise PolygonVertexNotCompleteException("The binary geometry is cut short.")
+    numpy = Geo2DBatch.numpy
+    if numpy is not None:
+        return numpy.frombuffer(data,dtype='<f8',count=count,offset=offset)
+    values = array('d',data[offset:offset+8*count])
+    if sys.byteorder!='little':
+        values.byteswap()
+    return values
+
+
+def fromBinary(data):
+    '''Restore a polygon or a segment array from its binary form, in a string of bytes or any buffer such as a
+    memory map. The coordinates are viewed in place when numpy is installed.
+    A polygon is ready to be queried: it is not checked again, and its saved properties are cached.'''
+    if len(data)<_header.size:
+        raise GeometryTypeError("Not a binary geometry: too short.")
+    magic,version,kind,flags,count = _header.unpack_from(data,0)
+    if magic!=formatMagic:
+        raise GeometryTypeError("Not a binary geometry.")
+    if version!=formatVersion:
+        raise GeometryTypeError("Unsupported version %d of binary geometry." %version)
+    offset = _header.size
+
+    if kind==polygonKind:
+        cache = {}
+        if flags&cachedFlag:
+            minX,minY,maxX,maxY,area,convex = _polygonProperties.unpack_from(data,offset)
+            offset += _polygonProperties.size
+            cache = {'boundingBox':(minX,minY,maxX,maxY),'signedArea':area,'convex':bool(convex)}
+        if count<3:
+            raise PolygonVertexNotCompleteException("Cannot construct a polygon from the parameters as not enough vertexex.")
+        coordinates = _coordinateBlock(data,offset,2*count)
+        return Polygon2D._fromTrustedPoints(PointArray(coordinates[0::2],coordinates[1::2]),cache)
+
+    elif kind==segmentsKind:
+        coordinates = _coordinateBlock(data,offset,4*count)
+        return SegmentArray(PointArray(coordinates[0::4],coordinates[1::4]),PointArray(coordinates[2::4],coordinates[3::4]))
+
+    raise GeometryTypeError("Unknown kind %d of binary geometry." %kind)
+
+
+def saveBinary(geometry,path):
+    '''Write the binary form of a polygon or of a segment set to a file.'''
+    data = toBinary(geometry)
+    binaryFile = open(path,'wb')
+    try:
+        binaryFile.write(data)
+    finally:
+        binaryFile.close()
+
+
+def loadBinary(path):
+    '''Restore a polygon or a segment array from a file, which is memory-mapped rather than read, see 'fromBinary()'.'''
+    if not os.path.getsize(path):
+        raise GeometryTypeError("Not a binary geometry: too short.")
+    binaryFile = open(path,'rb')
+    try:
+        mapped = mmap.mmap(binaryFile.fileno(),0,access=mmap.ACCESS_READ)
+    finally:
+        binaryFile.close()
+    return fromBinary(mapped)    # the mapping stays open as long as the coordinates viewing it are used
+
+
+
+
+if __name__=='__main__':
+    import tempfile
+
+    polygon = Polygon2D((0,0),(0,1),(-1,1),(-1,-1),(3,-1),(3,0),(2,0),(2,1),(1,1),(1,0))
+    path = os.path.join(tempfile.gettempdir(),'polygon.g2db')
+    saveBinary(polygon,path)
+    loaded = loadBinary(path)
+    print loaded
+    print loaded.getBoundingBox(),loaded.getSignedArea(),loaded.isConvex()
+    print fromBinary(toBinary(loaded.edgeList))
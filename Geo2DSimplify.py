@@ -0,0 +1,153 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# simplification of polygons with too many vertexes, keeping every vertex dropped within a distance of the
+# simplified edge in its place, and the simplified polygon free of crossings it did not have.
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+from Geo2DFunctions import findAllIntersections
+from Geo2DKernels import pointSegmentDistance
+from Geo2DPredicates import crossSign,dotSign
+import Geo2DBatch
+
+
+simplifyVectorMin = 64    # spans of at least this many vertexes are measured with numpy, if it is installed
+
+
+def _farthest(xs,ys,start,end):
+    '''Get the index of the vertex between start and end (both excluded) farthest from the segment between them,
+    and its distance.'''
+    x1,y1,x2,y2 = float(xs[start]),float(ys[start]),float(xs[end]),float(ys[end])
+    numpy = Geo2DBatch.numpy
+    if numpy is not None and end-start>simplifyVectorMin:
+        # the same steps as 'pointSegmentDistance()', for the whole span at once
+        px = xs[start+1:end]
+        py = ys[start+1:end]
+        dx = x2-x1
+        dy = y2-y1
+        length2 = dx*dx+dy*dy
+        if length2==0:
+            distances = numpy.sqrt((px-x1)**2+(py-y1)**2)
+        else:
+            t = numpy.clip(((px-x1)*dx+(py-y1)*dy)/length2,0.0,1.0)
+            footX = numpy.where(t==1.0,x2,x1+t*dx)
+            footY = numpy.where(t==1.0,y2,y1+t*dy)
+            distances = numpy.sqrt((px-footX)**2+(py-footY)**2)
+        i = int(distances.argmax())
+        return start+1+i,float(distances[i])
+
+    best = start+1
+    bestDistance = -1.0
+    for i in xrange(start+1,end):
+        distance = pointSegmentDistance(float(xs[i]),float(ys[i]),x1,y1,x2,y2)
+        if distance>bestDistance:
+            best = i
+            bestDistance = distance
+    return best,bestDistance
+
+
+def _crossedSpans(xs,ys,kept):
+    '''Get the positions in kept of the simplified edges that cross or touch other ones, away from the vertexes
+    they share with the edges next to them, or turn back on the edges before them.'''
+    count = len(kept)
+    segments = []
+    for k in xrange(count):
+        a = kept[k]
+        b = kept[(k+1)%count]
+        segments.append(Segment2D(Point2D(float(xs[a]),float(ys[a])),Point2D(float(xs[b]),float(ys[b]))))
+
+    crossed = set()
+    for i,j,intersect in findAllIntersections(segments):
+        if j==i+1 or (i==0 and j==count-1):
+            continue    # edges next to each other meet at their shared vertex, or are parallel and skipped
+        crossed.add(i)
+        crossed.add(j)
+
+    for k in xrange(count):
+        previous = segments[k-1]
+        following = segments[k]
+        args = (previous.startPoint.x,previous.startPoint.y,previous.endPoint.x,previous.endPoint.y,
+                following.startPoint.x,following.startPoint.y,following.endPoint.x,following.endPoint.y)
+        if crossSign(*args)==0 and dotSign(*args)<0:
+            crossed.add((k-1)%count)    # the edge turns back on itself
+            crossed.add(k)
+    return crossed
+
+
+def simplifyPolygon(polygon,tolerance):
+    '''Get a simplified copy of a polygon, with the vertexes dropped that are within tolerance of the simplified
+    edge in their place, by the Douglas-Peucker algorithm over its ring. Where the simplified edges would cross each
+    other, the vertexes farthest from them are kept again until they do not, so that a simple polygon stays simple.
+    Collinear overlapping edges are not looked for, as 'findAllIntersections()' skips parallel segments.
+    O(n log n) for most rings, with O(n^2) at worst for ones split unevenly at each step.'''
+    if not isinstance(polygon,Polygon2D):
+        raise GeometryTypeError("A non-polygon object encountered in function 'simplifyPolygon()'.")
+    if ((not isinstance(tolerance,int)) and (not isinstance(tolerance,float))) or tolerance<0:
+        raise CoordinateNotDigitException("The tolerance of a simplification must be a non-negative number.")
+
+    xs,ys = polygon._getCoordinates()
+    count = len(xs)
+    if count<=3:
+        return Polygon2D._fromTrustedPoints(PointArray(xs,ys))
+    xs.append(xs[0])    # the ring closed, the vertex at index count being the first one again
+    ys.append(ys[0])
+    numpy = Geo2DBatch.numpy
+    if numpy is not None:
+        xs = numpy.array(xs)
+        ys = numpy.array(ys)
+
+    # split the ring at the first vertex and the vertex farthest from it
+    split = max(xrange(1,count),key=lambda i:(xs[i]-xs[0])**2+(ys[i]-ys[0])**2)
+    keep = bytearray(count+1)
+    keep[0] = keep[split] = keep[count] = 1
+
+    spans = [(0,split),(split,count)]
+    while spans:
+        start,end = spans.pop()
+        if end-start<2:
+            continue
+        i,distance = _farthest(xs,ys,start,end)
+        if distance>tolerance:
+            keep[i] = 1
+            spans.append((start,i))
+            spans.append((i,end))
+
+    if sum(keep)<4:    # a triangle at least, with the vertex farthest from the split
+        first = _farthest(xs,ys,0,split)
+        second = _farthest(xs,ys,split,count)
+        keep[max(first,second,key=lambda found:found[1])[0]] = 1
+
+    while True:
+        kept = [i for i in xrange(count) if keep[i]]
+        added = False
+        for k in _crossedSpans(xs,ys,kept):
+            start = kept[k]
+            end = kept[k+1] if k+1<len(kept) else count
+            if end-start>=2:
+                keep[_farthest(xs,ys,start,end)[0]] = 1
+                added = True
+        if not added:
+            break    # no crossing left, or only those of the polygon itself
+
+    return Polygon2D._fromTrustedPoints(PointArray([float(xs[i]) for i in kept],[float(ys[i]) for i in kept]))
+
+
+
+
+if __name__=='__main__':
+    import math
+
+    vertexes = []
+    for i in xrange(720):
+        angle = math.pi*i/360
+        radius = 2+0.02*math.sin(40*angle)+(0.5 if 100<=i<120 else 0.0)
+        vertexes.append((radius*math.cos(angle),radius*math.sin(angle)))
+    polygon = Polygon2D(*vertexes)
+    for tolerance in (0.001,0.05,0.5):
+        simplified = simplifyPolygon(polygon,tolerance)
+        print tolerance,len(simplified.vertexList),simplified.getSignedArea()/polygon.getSignedArea()
+
+    # the notch on the top is within the tolerance, but going straight over it would cross the bump on the bottom
+    polygon = Polygon2D((0,0),(4,0),(5,0.3),(6,0),(10,0),(10,1),(8,0.2),(5,0.4),(2,0.2),(0,1))
+    print simplifyPolygon(polygon,0.25)
@@ -0,0 +1,152 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# streaming classification of points read from files larger than memory, one chunk of points at a time.
+# points are read from CSV, or from a raw file of little-endian float64 pairs <x0, y0, x1, y1, ...> which is
+# memory-mapped so that chunks are views of the file rather than copies. e.g.
+#     python Geo2DStream.py points.bin mask.bin 0,0 0,1 1,1 1,0
+
+import csv
+import mmap
+import os
+import sys
+from array import array
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+import Geo2DBatch
+
+
+streamChunkPoints = 1<<16    # points read and classified at a time
+
+
+def readCSVChunks(path,chunkPoints=streamChunkPoints,xColumn=0,yColumn=1,header=False,delimiter=','):
+    '''Read the points of a CSV file in chunks, yielding tuples (xs, ys) of float arrays of at most chunkPoints points.
+    The first row is skipped if header is true, and so are blank rows.'''
+    if (not isinstance(chunkPoints,int)) or chunkPoints<1:
+        raise GeometryTypeError("The count of points in a chunk must be a positive integer.")
+    csvFile = open(path,'rb')
+    try:
+        rows = csv.reader(csvFile,delimiter=delimiter)
+        if header:
+            next(rows,None)
+        xs = array('d')
+        ys = array('d')
+        for row in rows:
+            if not row:
+                continue
+            try:
+                x = float(row[xColumn])
+                y = float(row[yColumn])
+            except (ValueError,IndexError):
+                raise CoordinateNotDigitException("Invalid coordinates in line %d of '%s'." %(rows.line_num,path))
+            xs.append(x)
+            ys.append(y)
+            if len(xs)==chunkPoints:
+                yield xs,ys
+                xs = array('d')
+                ys = array('d')
+        if xs:
+            yield xs,ys
+    finally:
+        csvFile.close()
+
+
+def readBinaryChunks(path,chunkPoints=streamChunkPoints):
+    '''Read the points of a raw little-endian float64 file in chunks, yielding tuples (xs, ys) of at most chunkPoints
+    points. The file is memory-mapped: with numpy each chunk is a view of the mapped file, without copying, which is
+    only paged in as it is read. Without numpy each chunk is copied into float arrays.'''
+    if (not isinstance(chunkPoints,int)) or chunkPoints<1:
+        raise GeometryTypeError("The count of points in a chunk must be a positive integer.")
+    size = os.path.getsize(path)
+    if size%16:
+        raise PolygonVertexNotCompleteException("The file '%s' does not hold whole pairs of float64 coordinates." %path)
+    if not size:
+        return
+
+    binaryFile = open(path,'rb')
+    try:
+        mapped = mmap.mmap(binaryFile.fileno(),0,access=mmap.ACCESS_READ)
+    finally:
+        binaryFile.close()    # the mapping keeps its own handle of the file
+
+    numpy = Geo2DBatch.numpy
+    count = size//16
+    # the mapping is left to be closed when the last view of it is released, since the chunks may outlive the reading
+    if numpy is not None:
+        coordinates = numpy.frombuffer(mapped,dtype='<f8')
+        for start in xrange(0,count,chunkPoints):
+            chunk = coordinates[2*start:2*min(start+chunkPoints,count)]
+            yield chunk[0::2],chunk[1::2]
+        return
+
+    for start in xrange(0,count,chunkPoints):
+        chunk = array('d',mapped[16*start:16*min(start+chunkPoints,count)])
+        if sys.byteorder!='little':
+            chunk.byteswap()
+        yield chunk[0::2],chunk[1::2]
+
+
+def readPointChunks(path,fileFormat=None,chunkPoints=streamChunkPoints,**csvOptions):
+    '''Read the points of a file in chunks, of the given format 'csv' or 'binary', or by default 'csv' for files
+    named '.csv' and 'binary' otherwise.'''
+    if fileFormat is None:
+        fileFormat = 'csv' if path.lower().endswith('.csv') else 'binary'
+    if fileFormat=='csv':
+        return readCSVChunks(path,chunkPoints,**csvOptions)
+    elif fileFormat=='binary':
+        return readBinaryChunks(path,chunkPoints)
+    raise GeometryTypeError("Unknown point file format '%s'." %fileFormat)
+
+
+def classifyChunks(chunks,polygon,processes=1):
+    '''Classify each chunk (xs, ys) of points against a polygon, yielding one result of 'isInPolygonBatch()' for each
+    chunk as it is read. Work is split across processes if more than one is given, in one pool for all chunks, see
+    'ParallelClassifier'.'''
+    if not isinstance(polygon,Polygon2D):
+        raise GeometryTypeError("A non-polygon object encountered in function 'classifyChunks()'.")
+    if processes==1:
+        for xs,ys in chunks:
+            yield Geo2DBatch.isInPolygonBatch(xs,ys,polygon)
+        return
+
+    from Geo2DParallel import ParallelClassifier
+    classifier = ParallelClassifier(polygon,processes)    # one pool for every chunk
+    try:
+        for xs,ys in chunks:
+            yield classifier.classify(xs,ys)
+    finally:
+        classifier.close()
+
+
+def _maskBytes(mask):
+    if Geo2DBatch.numpy is not None:
+        return Geo2DBatch.numpy.asarray(mask,dtype=Geo2DBatch.numpy.uint8).tobytes()
+    return bytes(bytearray(mask))
+
+
+def classifyFile(path,polygon,output,fileFormat=None,chunkPoints=streamChunkPoints,processes=1,**csvOptions):
+    '''Classify every point of a file against a polygon, writing one byte for each point to the output file, 1 if
+    it is in the polygon and 0 if not, as each chunk is done. Memory use is bounded by the chunk size, whatever the
+    size of the file. Return a tuple of the count of points and the count of those in the polygon.'''
+    chunks = readPointChunks(path,fileFormat,chunkPoints,**csvOptions)
+    count = insideCount = 0
+    outputFile = open(output,'wb')
+    try:
+        for mask in classifyChunks(chunks,polygon,processes):
+            outputFile.write(_maskBytes(mask))
+            count += len(mask)
+            insideCount += int(sum(mask))
+    finally:
+        outputFile.close()
+    return count,insideCount
+
+
+
+
+if __name__=='__main__':
+    if len(sys.argv)<6:
+        print "usage: python Geo2DStream.py <points.csv or points.bin> <mask output> <x,y> <x,y> <x,y> ..."
+        sys.exit(1)
+    vertexes = [tuple(float(value) for value in eachVertex.split(',')) for eachVertex in sys.argv[3:]]
+    print classifyFile(sys.argv[1],Polygon2D(*vertexes),sys.argv[2])
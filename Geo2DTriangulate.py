@@ -0,0 +1,212 @@
+#! /usr/bin/env python
+#coding=utf-8
+
+# triangulation of polygons by ear clipping, and what is built on it: the area, the centroid, and points sampled
+# uniformly from a polygon.
+
+import bisect
+import math
+import random
+
+from Geo2DExceptions import *
+from Geo2DElements import *
+from Geo2DPredicates import crossSign,orientation
+import Geo2DBatch
+
+
+class Triangulation(object):
+    '''Triangles covering a polygon, found by ear clipping. A vertex is an ear if the triangle it makes with its two
+    neighbours turns counterclockwise and holds no other vertex. Only reflex vertexes can be in an ear, and they are
+    kept in a spatial hash, so that each test looks at the few ones near the triangle rather than at all vertexes.
+    The triangles are tuples of indexes into the vertexes of the polygon, each one counterclockwise.
+    A self-intersecting polygon may leave no ear; a vertex is then clipped anyway, so that the triangulation ends.'''
+
+    def __init__(self,polygon):
+        if not isinstance(polygon,Polygon2D):
+            raise GeometryTypeError("A non-polygon object encountered when trying to triangulate a polygon.")
+        self.xs,self.ys = polygon._getCoordinates()
+        order = range(len(self.xs))
+        if polygon.getOrientation()<0:
+            order.reverse()    # counterclockwise
+        self.triangles = self._clipEars(order)
+
+        self.areas = []
+        self.area = 0.0
+        centroidX = centroidY = 0.0
+        xs,ys = self.xs,self.ys
+        for a,b,c in self.triangles:
+            area = ((xs[b]-xs[a])*(ys[c]-ys[a])-(ys[b]-ys[a])*(xs[c]-xs[a]))/2.0
+            self.areas.append(area)
+            self.area += area
+            centroidX += area*(xs[a]+xs[b]+xs[c])/3.0
+            centroidY += area*(ys[a]+ys[b]+ys[c])/3.0
+        self.cumulativeAreas = []    # to pick a triangle by area
+        total = 0.0
+        for eachArea in self.areas:
+            total += eachArea
+            self.cumulativeAreas.append(total)
+        self.centroid = (centroidX/self.area,centroidY/self.area) if self.area else (xs[0],ys[0])
+        self._columns = None    # coordinates of the corners of the triangles as numpy arrays, made for sampling
+
+
+    def _clipEars(self,order):
+        xs = [self.xs[i] for i in order]
+        ys = [self.ys[i] for i in order]
+        count = len(xs)
+        previous = [i-1 for i in xrange(count)]
+        previous[0] = count-1
+        following = [i+1 for i in xrange(count)]
+        following[-1] = 0
+
+        def turn(a,b,c):    # 1 if a-b-c turns counterclockwise, -1 if clockwise
+            return crossSign(xs[a],ys[a],xs[b],ys[b],xs[b],ys[b],xs[c],ys[c])
+
+        reflex = bytearray(count)
+        for i in xrange(count):
+            if turn(previous[i],i,following[i])<0:
+                reflex[i] = 1
+
+        # spatial hash of the reflex vertexes, about one of them in each cell
+        minX = min(xs)
+        minY = min(ys)
+        cells = max(1,int(math.sqrt(sum(reflex))))
+        cellWidth = (max(xs)-minX)/cells or 1.0
+        cellHeight = (max(ys)-minY)/cells or 1.0
+        cellOf = lambda x,y:(min(int((x-minX)/cellWidth),cells-1),min(int((y-minY)/cellHeight),cells-1))
+        hashed = {}
+        for i in xrange(count):
+            if reflex[i]:
+                hashed.setdefault(cellOf(xs[i],ys[i]),[]).append(i)
+
+        def isEar(a,b,c):
+            if turn(a,b,c)<=0:
+                return False
+            lowColumn,lowRow = cellOf(min(xs[a],xs[b],xs[c]),min(ys[a],ys[b],ys[c]))
+            highColumn,highRow = cellOf(max(xs[a],xs[b],xs[c]),max(ys[a],ys[b],ys[c]))
+            for column in xrange(lowColumn,highColumn+1):
+                for row in xrange(lowRow,highRow+1):
+                    for p in hashed.get((column,row),()):
+                        if p==a or p==b or p==c:
+                            continue
+                        if (orientation(xs[a],ys[a],xs[b],ys[b],xs[p],ys[p])>=0 and
+                            orientation(xs[b],ys[b],xs[c],ys[c],xs[p],ys[p])>=0 and
+                            orientation(xs[c],ys[c],xs[a],ys[a],xs[p],ys[p])>=0):
+                            return False    # a vertex in the triangle, or on its edge
+            return True
+
+        triangles = []
+        remaining = count
+        i = 0
+        stalled = 0    # vertexes tested since the last ear was clipped
+        while remaining>3:
+            a = previous[i]
+            c = following[i]
+            if stalled<remaining:
+                if isEar(a,i,c):
+                    triangles.append((order[a],order[i],order[c]))
+                elif turn(a,i,c)!=0:
+                    i = c
+                    stalled += 1
+                    continue
+                # a vertex where the polygon goes straight on or turns back is clipped, leaving no triangle
+            elif turn(a,i,c)>0:    # no ear left, clipped anyway
+                triangles.append((order[a],order[i],order[c]))
+
+            following[a] = c
+            previous[c] = a
+            if reflex[i]:
+                hashed[cellOf(xs[i],ys[i])].remove(i)
+            for j in (a,c):    # a neighbour of an ear only turns less, and is not reflex any more once it turns left
+                if reflex[j] and turn(previous[j],j,following[j])>0:
+                    reflex[j] = 0
+                    hashed[cellOf(xs[j],ys[j])].remove(j)
+            remaining -= 1
+            stalled = 0
+            i = c
+
+        a = previous[i]
+        c = following[i]
+        if turn(a,i,c)>0:
+            triangles.append((order[a],order[i],order[c]))
+        return triangles
+
+
+    def sample(self,count,seed=None):
+        '''Get count points sampled uniformly from the polygon as a point array: a triangle is picked with a chance
+        proportional to its area, and a point in it with the square root of a uniform variable, so that the points
+        do not gather at a corner. seed makes the points the same each time.'''
+        if (not isinstance(count,int)) or count<0:
+            raise GeometryTypeError("The count of points to sample must be a non-negative integer.")
+        if not self.triangles:
+            raise GeometryTypeError("Cannot sample points from a polygon with no area.")
+        numpy = Geo2DBatch.numpy
+        xs,ys = self.xs,self.ys
+
+        if numpy is not None:
+            if self._columns is None:
+                corners = numpy.array(self.triangles,dtype=numpy.intp)
+                xs = numpy.array(xs)
+                ys = numpy.array(ys)
+                self._columns = (xs[corners[:,0]],ys[corners[:,0]],xs[corners[:,1]],ys[corners[:,1]],
+                                 xs[corners[:,2]],ys[corners[:,2]],numpy.array(self.cumulativeAreas))
+            ax,ay,bx,by,cx,cy,cumulative = self._columns
+            generator = numpy.random.RandomState(seed)
+            picked = numpy.searchsorted(cumulative,generator.random_sample(count)*cumulative[-1],side='right')
+            numpy.minimum(picked,len(cumulative)-1,out=picked)
+            r1 = numpy.sqrt(generator.random_sample(count))
+            r2 = generator.random_sample(count)
+            wa = 1.0-r1    # weights of the three corners
+            wb = r1*(1.0-r2)
+            wc = r1*r2
+            return PointArray(wa*ax[picked]+wb*bx[picked]+wc*cx[picked],wa*ay[picked]+wb*by[picked]+wc*cy[picked])
+
+        generator = random.Random(seed)
+        cumulative = self.cumulativeAreas
+        sampledXs = []
+        sampledYs = []
+        for k in xrange(count):
+            a,b,c = self.triangles[min(bisect.bisect_right(cumulative,generator.random()*cumulative[-1]),len(cumulative)-1)]
+            r1 = math.sqrt(generator.random())
+            r2 = generator.random()
+            sampledXs.append((1.0-r1)*xs[a]+r1*(1.0-r2)*xs[b]+r1*r2*xs[c])
+            sampledYs.append((1.0-r1)*ys[a]+r1*(1.0-r2)*ys[b]+r1*r2*ys[c])
+        return PointArray(sampledXs,sampledYs)
+
+
+    def __str__(self):
+        return "Triangulation <%d triangles>" %len(self.triangles)
+
+
+def getTriangulation(polygon):
+    '''Get the triangulation of a polygon. It is made on the first call and kept until the polygon is edited or
+    invalidated.'''
+    if not isinstance(polygon,Polygon2D):
+        raise GeometryTypeError("A non-polygon object encountered in function 'getTriangulation()'.")
+    triangulation = polygon._cache.get('triangulation')
+    if triangulation is None:
+        triangulation = Triangulation(polygon)
+        polygon._cache['triangulation'] = triangulation
+    return triangulation
+
+
+def getCentroid(polygon):
+    '''Get the centroid of a polygon, the center of its area, as a point.'''
+    x,y = getTriangulation(polygon).centroid
+    return Point2D(x,y)
+
+
+def samplePoints(polygon,count,seed=None):
+    '''Get count points sampled uniformly from a polygon as a point array, see 'Triangulation.sample()'.'''
+    return getTriangulation(polygon).sample(count,seed)
+
+
+
+
+if __name__=='__main__':
+    polygon = Polygon2D((0,0),(0,1),(-1,1),(-1,-1),(3,-1),(3,0),(2,0),(2,1),(1,1),(1,0))
+    triangulation = getTriangulation(polygon)
+    print triangulation,triangulation.triangles
+    print triangulation.area,polygon.getSignedArea()
+    print getCentroid(polygon)
+    points = samplePoints(polygon,5,seed=1)
+    print [str(eachPoint) for eachPoint in points]
@@ -4,28 +4,41 @@
 # vector class of 2d geometry
 
 import math
+from array import array
 
 from Geo2DElements import *
+from Geo2DElements import _getSlotsState,_setSlotsState,_floatBuffer
+import Geo2DBatch
 
 
 class Vector2D(PlaneGeometryComponent):
+    __slots__ = ('x','y','_polarAngle','_norm')    # polar angle and norm are derived on first access
+    
     def __init__(self,x,y):
-        self.x = 0.0
-        self.y = 0.0
-        self.polarAngle = 0.0
-        self.norm = 0.0
-        
         if (not isinstance(x,int)) and (not isinstance(x,float)):
             raise CoordinateNotDigitException("Invalid parameter type for the x-coordinate to construct a vector.")
         if (not isinstance(y,int)) and (not isinstance(y,float)):
             raise CoordinateNotDigitException("Invalid parameter type for the y-coordinate to construct a vector.")
         self.x = float(x)
         self.y = float(y)
-        
-        self.polarAngle = math.atan2(self.y,self.x)
-        self.norm = (self.x*self.x + self.y*self.y)**0.5
+        self._polarAngle = None    # not derived yet
+        self._norm = None
         
         
+    @property
+    def polarAngle(self):
+        if self._polarAngle is None:
+            self._polarAngle = math.atan2(self.y,self.x)
+        return self._polarAngle
+    
+    
+    @property
+    def norm(self):
+        if self._norm is None:
+            self._norm = (self.x*self.x + self.y*self.y)**0.5
+        return self._norm
+    
+    
     def __add__(self,other):
         if not isinstance(other,Vector2D):
             raise GeometryTypeError("A non-vector object encountered when trying to determine equivalence of two vectors.")
@@ -39,6 +52,10 @@ class Vector2D(PlaneGeometryComponent):
         return self.x==other.x and self.y==other.y
     
     
+    __getstate__ = _getSlotsState
+    __setstate__ = _setSlotsState
+    
+    
     def __str__(self):
         return "Vector2D <%.2f, %.2f>" %(self.x,self.y)
     
@@ -53,6 +70,227 @@ def getInnerProduct(v1,v2):
     return v1.x*v2.x + v1.y*v2.y
 
 
+def _emptyColumn(count):
+    if Geo2DBatch.numpy is not None:
+        return Geo2DBatch.numpy.empty(count)
+    return array('d',[0.0])*count
+
+
+class VectorArray(object):
+    '''Vectors stored as two contiguous columns of float64 components, operated on all at once. With numpy the
+    columns are numpy arrays and each operation is a few whole-array steps; without it they are float arrays and
+    plain loops. Vector2D objects are created only when items are read.
+    Each operation takes another vector array of the same length, or one Vector2D for all vectors, and can write its
+    result into out, a vector array or a float64 column of the right length given again and again (or the vector
+    array itself), so that the result is not allocated each time. The products and norms with numpy still make one
+    temporary column for their second term.'''
+    
+    def __init__(self,xs=(),ys=None):    # receive the x-components and the y-components, or one flat sequence <x0, y0, x1, y1, ...>
+        if ys is None:
+            if len(xs)&1:
+                raise CoordinateNotDigitException("Cannot construct a vector array from an odd count of components.")
+            ys = xs[1::2]
+            xs = xs[0::2]
+        if len(xs)!=len(ys):
+            raise GeometryTypeError("Cannot construct a vector array as the count of x-components and y-components differ.")
+        
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            self.xs = numpy.asarray(xs,dtype=numpy.float64)    # shared rather than copied when they are already float64
+            self.ys = numpy.asarray(ys,dtype=numpy.float64)
+        else:
+            self.xs = _floatBuffer(xs)
+            self.ys = _floatBuffer(ys)
+            
+            
+    @classmethod
+    def fromVectors(cls,vectors):
+        '''Construct a vector array from Vector2D objects.'''
+        xs = array('d')
+        ys = array('d')
+        for eachVector in vectors:
+            if not isinstance(eachVector,Vector2D):
+                raise GeometryTypeError("A non-vector object encountered when trying to construct a vector array.")
+            xs.append(eachVector.x)
+            ys.append(eachVector.y)
+        return cls(xs,ys)
+    
+    
+    def toVectors(self):
+        '''Get the vectors as a list of Vector2D objects.'''
+        return list(self)
+    
+    
+    def __len__(self):
+        return len(self.xs)
+    
+    
+    def __getitem__(self,index):
+        if isinstance(index,slice):
+            return VectorArray(self.xs[index],self.ys[index])
+        return Vector2D(float(self.xs[index]),float(self.ys[index]))
+    
+    
+    def __iter__(self):
+        xs = self.xs
+        ys = self.ys
+        for i in xrange(len(xs)):
+            yield Vector2D(float(xs[i]),float(ys[i]))
+            
+            
+    def _operand(self,other):
+        '''Get the components of the other operand, as columns of a vector array or as two floats of a Vector2D.'''
+        if isinstance(other,VectorArray):
+            if len(other)!=len(self):
+                raise GeometryTypeError("The two vector arrays are not of the same length.")
+            return other.xs,other.ys
+        if isinstance(other,Vector2D):
+            if Geo2DBatch.numpy is not None:
+                return other.x,other.y    # broadcast by numpy
+            return [other.x]*len(self),[other.y]*len(self)
+        raise GeometryTypeError("A non-vector object encountered in an operation of a vector array.")
+    
+    
+    def _vectorOutput(self,out):
+        if out is None:
+            return VectorArray(_emptyColumn(len(self)),_emptyColumn(len(self)))
+        if not isinstance(out,VectorArray) or len(out)!=len(self):
+            raise GeometryTypeError("The output of a vector operation must be a vector array of the same length.")
+        return out
+    
+    
+    def _columnOutput(self,out):
+        if out is None:
+            return _emptyColumn(len(self))
+        if len(out)!=len(self):
+            raise GeometryTypeError("The output of a vector operation must be a column of the same length.")
+        return out
+    
+    
+    def add(self,other,out=None):
+        '''Get the sum of each vector and the other one, as a vector array.'''
+        otherXs,otherYs = self._operand(other)
+        out = self._vectorOutput(out)
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            numpy.add(self.xs,otherXs,out=out.xs)
+            numpy.add(self.ys,otherYs,out=out.ys)
+        else:
+            xs,ys,outXs,outYs = self.xs,self.ys,out.xs,out.ys
+            for i in xrange(len(xs)):
+                outXs[i] = xs[i]+otherXs[i]
+                outYs[i] = ys[i]+otherYs[i]
+        return out
+    
+    
+    def subtract(self,other,out=None):
+        '''Get each vector minus the other one, as a vector array.'''
+        otherXs,otherYs = self._operand(other)
+        out = self._vectorOutput(out)
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            numpy.subtract(self.xs,otherXs,out=out.xs)
+            numpy.subtract(self.ys,otherYs,out=out.ys)
+        else:
+            xs,ys,outXs,outYs = self.xs,self.ys,out.xs,out.ys
+            for i in xrange(len(xs)):
+                outXs[i] = xs[i]-otherXs[i]
+                outYs[i] = ys[i]-otherYs[i]
+        return out
+    
+    
+    def scale(self,factor,out=None):
+        '''Get each vector multiplied by a float, or by its own float in a sequence of the same length.'''
+        numpy = Geo2DBatch.numpy
+        if isinstance(factor,int) or isinstance(factor,float):
+            factors = factor if numpy is not None else [factor]*len(self)
+        elif len(factor)!=len(self):
+            raise GeometryTypeError("The factors and the vector array are not of the same length.")
+        else:
+            factors = factor
+        out = self._vectorOutput(out)
+        if numpy is not None:
+            numpy.multiply(self.xs,factors,out=out.xs)
+            numpy.multiply(self.ys,factors,out=out.ys)
+        else:
+            xs,ys,outXs,outYs = self.xs,self.ys,out.xs,out.ys
+            for i in xrange(len(xs)):
+                outXs[i] = xs[i]*factors[i]
+                outYs[i] = ys[i]*factors[i]
+        return out
+    
+    
+    def innerProducts(self,other,out=None):
+        '''Get the inner product of each vector and the other one, as a column, the same as 'getInnerProduct()'.'''
+        otherXs,otherYs = self._operand(other)
+        out = self._columnOutput(out)
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            numpy.multiply(self.xs,otherXs,out=out)
+            out += self.ys*otherYs
+        else:
+            xs,ys = self.xs,self.ys
+            for i in xrange(len(xs)):
+                out[i] = xs[i]*otherXs[i] + ys[i]*otherYs[i]
+        return out
+    
+    
+    def crossProducts(self,other,out=None):
+        '''Get the cross product of each vector and the other one, as a column, positive if the other one turns
+        counterclockwise from this one.'''
+        otherXs,otherYs = self._operand(other)
+        out = self._columnOutput(out)
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            numpy.multiply(self.xs,otherYs,out=out)
+            out -= self.ys*otherXs
+        else:
+            xs,ys = self.xs,self.ys
+            for i in xrange(len(xs)):
+                out[i] = xs[i]*otherYs[i] - ys[i]*otherXs[i]
+        return out
+    
+    
+    def norms(self,out=None):
+        '''Get the norm of each vector as a column, the same as 'Vector2D.norm'.'''
+        out = self._columnOutput(out)
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            numpy.multiply(self.xs,self.xs,out=out)
+            out += self.ys*self.ys
+            numpy.power(out,0.5,out=out)    # as 'Vector2D.norm' does, rather than numpy.sqrt
+        else:
+            xs,ys = self.xs,self.ys
+            for i in xrange(len(xs)):
+                out[i] = (xs[i]*xs[i] + ys[i]*ys[i])**0.5
+        return out
+    
+    
+    def polarAngles(self,out=None):
+        '''Get the polar angle of each vector as a column, the same as 'Vector2D.polarAngle'.'''
+        out = self._columnOutput(out)
+        numpy = Geo2DBatch.numpy
+        if numpy is not None:
+            numpy.arctan2(self.ys,self.xs,out=out)
+        else:
+            xs,ys = self.xs,self.ys
+            for i in xrange(len(xs)):
+                out[i] = math.atan2(ys[i],xs[i])
+        return out
+    
+    
+    __add__ = add
+    __sub__ = subtract
+    
+    
+    def __mul__(self,factor):
+        return self.scale(factor)
+    
+    
+    def __str__(self):
+        return "VectorArray <%d vectors>" %len(self)
+
+
 
 
 if __name__=='__main__':
@@ -62,4 +300,11 @@ if __name__=='__main__':
     print v1
     print v1==v2
     print (v1+v2)
-    print getInnerProduct(v1,v2)
\ No newline at end of file
+    print getInnerProduct(v1,v2)
+    
+    vectors = VectorArray.fromVectors([v1,v2,Vector2D(0,-2)])
+    print vectors.add(v2).toVectors()[0]
+    print list(vectors.innerProducts(vectors)),list(vectors.crossProducts(v1))
+    print list(vectors.norms()),list(vectors.polarAngles())
+    vectors.scale(2.0,out=vectors)
+    print vectors[2]
\ No newline at end of file